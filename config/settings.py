@@ -3,14 +3,14 @@ from pathlib import Path
 from dotenv import load_dotenv
 
 # Load environment variables with cascading priority
-# Later files override earlier ones
+# .env only fills in what the real environment doesn't set; later files override earlier ones.
+# Each file is loaded into the environment in turn, so its ${VAR} references can see
+# values from the files before it.
 load_dotenv(".env")
 load_dotenv(".env.local", override=True)
 env = os.environ.get("DJANGO_ENV", "development")
-if env == "production":
-    load_dotenv(".env.production", override=True)
-elif env == "development":
-    load_dotenv(".env.development", override=True)
+if env in ("production", "development"):
+    load_dotenv(f".env.{env}", override=True)
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -61,7 +61,7 @@ STATIC_URL = "/static/"
 STATICFILES_DIRS = [BASE_DIR / "static"]
 STATIC_ROOT = BASE_DIR / "staticfiles"
 
-# For Vercel deployment - always use StaticFilesHandler
+# For Vercel deployment - WhiteNoise serves static/ directly (see wsgi.py), no collectstatic
 STATICFILES_STORAGE = 'django.contrib.staticfiles.storage.StaticFilesStorage'
 
 # Prod security settings
@@ -1,9 +1,13 @@
 from django.urls import path, include
 from django.conf import settings
-from django.conf.urls.static import static
 
 urlpatterns = [
     path("", include("pylox_web.urls")),
 ]
 
-urlpatterns += static(settings.STATIC_URL, document_root=settings.STATICFILES_DIRS[0])
+# Dev-only static route; production serves static/ through WhiteNoise (see wsgi.py)
+if settings.DEBUG:
+    from django.conf.urls.static import static
+
+    _STATIC_ROOT = settings.STATICFILES_DIRS[0]
+    urlpatterns += static(settings.STATIC_URL, document_root=_STATIC_ROOT)
@@ -2,7 +2,7 @@ import os
 import sys
 from pathlib import Path
 from django.core.wsgi import get_wsgi_application
-from django.contrib.staticfiles.handlers import StaticFilesHandler
+from whitenoise import WhiteNoise
 
 # Add the project root to Python path
 project_root = Path(__file__).resolve().parent.parent
@@ -12,7 +12,7 @@ os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
 
 application = get_wsgi_application()
 
-# Wrap with StaticFilesHandler to serve static files
-application = StaticFilesHandler(application)
+# Serve static files straight from the WSGI layer, before requests reach Django
+application = WhiteNoise(application, root=str(project_root / "static"), prefix="static/")
 
 app = application
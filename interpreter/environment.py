@@ -1,6 +1,9 @@
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from .token_type import Token
 
+# Tells "not in this env" apart from a variable that holds nil, with a single dict probe
+_MISSING = object()
+
 
 class RuntimeError(Exception):
     def __init__(self, token: Token, message: str):
@@ -10,47 +13,64 @@ class RuntimeError(Exception):
 
 class Environment:
     """
-    Vars are store in a hash map.
+    Globals are stored in a hash map, since they're late-bound and looked up by name.
+    Locals are stored in an array; the Resolver already knows which slot each one lives in.
     Environments can be chained in a hierarchy.
     """
 
+    __slots__ = ("enclosing", "values", "slots", "_chain")
+
     def __init__(self, enclosing: Optional["Environment"] = None):
         self.enclosing = enclosing
         self.values: Dict[str, Any] = {}
+        self.slots: List[Any] = []
+
+        # This env followed by all its ancestors, so ancestor(distance) is one index instead of a walk
+        self._chain: Tuple["Environment", ...] = (
+            (self,) + enclosing._chain if enclosing is not None else (self,)
+        )
 
-    def define(self, name: str, value: Any) -> None:
-        self.values[name] = value
+    def define(self, name: str, value: Any) -> Optional[int]:
+        """Returns the slot index of a local, or None for a global."""
+        if self.enclosing is None:
+            self.values[name] = value
+            return None
+
+        # Locals are defined in the same order the Resolver declared them, so slots line up
+        self.slots.append(value)
+        return len(self.slots) - 1
 
     def get(self, name: Token) -> Any:
-        if name.lexeme in self.values:
-            return self.values[name.lexeme]
+        lexeme = name.lexeme
 
         # Lexical scoping - when getting or setting we search parent envs until we find it
-        if self.enclosing is not None:
-            return self.enclosing.get(name)
+        environment = self
+        while environment is not None:
+            value = environment.values.get(lexeme, _MISSING)
+            if value is not _MISSING:
+                return value
+            environment = environment.enclosing
 
-        raise RuntimeError(name, f"Undefined variable '{name.lexeme}'.")
+        raise RuntimeError(name, f"Undefined variable '{lexeme}'.")
 
     def assign(self, name: Token, value: Any) -> None:
-        if name.lexeme in self.values:
-            self.values[name.lexeme] = value
-            return
+        lexeme = name.lexeme
 
-        if self.enclosing is not None:
-            self.enclosing.assign(name, value)
-            return
+        environment = self
+        while environment is not None:
+            if lexeme in environment.values:
+                environment.values[lexeme] = value
+                return
+            environment = environment.enclosing
 
-        raise RuntimeError(name, f"Undefined variable '{name.lexeme}'.")
+        raise RuntimeError(name, f"Undefined variable '{lexeme}'.")
 
-    def get_at(self, distance: int, name: str) -> Any:
-        """Use when we know how far up the hierarchy a variable lives"""
-        return self.ancestor(distance).values[name]
+    def get_at(self, distance: int, slot: int) -> Any:
+        """Use when we know how far up the hierarchy a variable lives, and in which slot"""
+        return self.ancestor(distance).slots[slot]
 
-    def assign_at(self, distance: int, name: Token, value: Any) -> None:
-        self.ancestor(distance).values[name.lexeme] = value
+    def assign_at(self, distance: int, slot: int, value: Any) -> None:
+        self.ancestor(distance).slots[slot] = value
 
     def ancestor(self, distance: int) -> "Environment":
-        environment = self
-        for _ in range(distance):
-            environment = environment.enclosing
-        return environment
+        return self._chain[distance]
@@ -3,7 +3,8 @@ Expression AST nodes with Visitor Pattern
 
 From https://github.com/munificent/craftinginterpreters/blob/master/java/com/craftinginterpreters/lox/Expr.java
 This Python implementation is a bit different from the original Java:
-- ABC and abstractmethod instead of Java abstract class and interface
+- Base classes whose methods raise NotImplementedError instead of Java abstract class and interface,
+  so constructing a node doesn't pay for ABC's abstract-method check
 - Uses Python's form of generics - TypeVar
 - Simulates inner classes
 
@@ -25,80 +26,76 @@ The tradeoff is that when we add a new expression class, its behavior needs to b
 This file is just the scaffolding for setting up the Visitor pattern; the actual logic is in the interpreter, resolver, etc.
 """
 
-from abc import ABC, abstractmethod
-from typing import Any, List, Generic, TypeVar
+from typing import Any, Callable, Dict, List, Generic, Optional, TypeVar
 from .token_type import Token
 
 T = TypeVar("T")
 
 
-class ExprVisitor(ABC, Generic[T]):
-    @abstractmethod
+class ExprVisitor(Generic[T]):
     def visit_assign_expr(self, expr: "Assign") -> T:
-        pass
+        raise NotImplementedError
 
-    @abstractmethod
     def visit_binary_expr(self, expr: "Binary") -> T:
-        pass
+        raise NotImplementedError
 
-    @abstractmethod
     def visit_call_expr(self, expr: "Call") -> T:
-        pass
+        raise NotImplementedError
 
-    @abstractmethod
     def visit_get_expr(self, expr: "Get") -> T:
-        pass
+        raise NotImplementedError
 
-    @abstractmethod
     def visit_grouping_expr(self, expr: "Grouping") -> T:
-        pass
+        raise NotImplementedError
 
-    @abstractmethod
     def visit_literal_expr(self, expr: "Literal") -> T:
-        pass
+        raise NotImplementedError
 
-    @abstractmethod
     def visit_logical_expr(self, expr: "Logical") -> T:
-        pass
+        raise NotImplementedError
 
-    @abstractmethod
     def visit_set_expr(self, expr: "Set") -> T:
-        pass
+        raise NotImplementedError
 
-    @abstractmethod
     def visit_super_expr(self, expr: "Super") -> T:
-        pass
+        raise NotImplementedError
 
-    @abstractmethod
     def visit_this_expr(self, expr: "This") -> T:
-        pass
+        raise NotImplementedError
 
-    @abstractmethod
     def visit_unary_expr(self, expr: "Unary") -> T:
-        pass
+        raise NotImplementedError
 
-    @abstractmethod
     def visit_variable_expr(self, expr: "Variable") -> T:
-        pass
+        raise NotImplementedError
 
 
-class Expr(ABC):
-    @abstractmethod
+class Expr:
+    # Every node class declares __slots__, so nodes carry no per-instance __dict__.
+    # Nodes live as long as the program that holds them, so there's nothing to pool.
+    __slots__ = ()
+
     def accept(self, visitor: ExprVisitor[T]) -> T:
-        pass
+        raise NotImplementedError
 
 
 class Binary(Expr):
+    __slots__ = ("left", "operator", "right", "op")
+
     def __init__(self, left: Expr, operator: Token, right: Expr):
         self.left = left
         self.operator = operator
         self.right = right
+        # The operator's implementation, set by the interpreter during resolution
+        self.op: Optional[Callable[..., Any]] = None
 
     def accept(self, visitor: ExprVisitor[T]) -> T:
         return visitor.visit_binary_expr(self)
 
 
 class Grouping(Expr):
+    __slots__ = ("expression",)
+
     def __init__(self, expression: Expr):
         self.expression = expression
 
@@ -107,14 +104,20 @@ class Grouping(Expr):
 
 
 class Literal(Expr):
+    __slots__ = ("value", "text")
+
     def __init__(self, value: Any):
         self.value = value
+        # The printed form of the value, cached by the interpreter on first print
+        self.text: Optional[str] = None
 
     def accept(self, visitor: ExprVisitor[T]) -> T:
         return visitor.visit_literal_expr(self)
 
 
 class Unary(Expr):
+    __slots__ = ("operator", "right")
+
     def __init__(self, operator: Token, right: Expr):
         self.operator = operator
         self.right = right
@@ -124,23 +127,34 @@ class Unary(Expr):
 
 
 class Variable(Expr):
+    __slots__ = ("name", "distance", "slot")
+
     def __init__(self, name: Token):
         self.name = name
+        # Where the variable lives, set by the interpreter during resolution; -1 means global
+        self.distance = -1
+        self.slot = -1
 
     def accept(self, visitor: ExprVisitor[T]) -> T:
         return visitor.visit_variable_expr(self)
 
 
 class Assign(Expr):
+    __slots__ = ("name", "value", "distance", "slot")
+
     def __init__(self, name: Token, value: Expr):
         self.name = name
         self.value = value
+        self.distance = -1
+        self.slot = -1
 
     def accept(self, visitor: ExprVisitor[T]) -> T:
         return visitor.visit_assign_expr(self)
 
 
 class Logical(Expr):
+    __slots__ = ("left", "operator", "right")
+
     def __init__(self, left: Expr, operator: Token, right: Expr):
         self.left = left
         self.operator = operator
@@ -151,6 +165,8 @@ class Logical(Expr):
 
 
 class Call(Expr):
+    __slots__ = ("callee", "paren", "arguments")
+
     def __init__(self, callee: Expr, paren: Token, arguments: List[Expr]):
         self.callee = callee
         self.paren = paren
@@ -161,6 +177,8 @@ class Call(Expr):
 
 
 class Get(Expr):
+    __slots__ = ("object", "name")
+
     def __init__(self, obj: Expr, name: Token):
         self.object = obj
         self.name = name
@@ -170,6 +188,8 @@ class Get(Expr):
 
 
 class Set(Expr):
+    __slots__ = ("object", "name", "value")
+
     def __init__(self, obj: Expr, name: Token, value: Expr):
         self.object = obj
         self.name = name
@@ -180,17 +200,25 @@ class Set(Expr):
 
 
 class This(Expr):
+    __slots__ = ("keyword", "distance", "slot")
+
     def __init__(self, keyword: Token):
         self.keyword = keyword
+        self.distance = -1
+        self.slot = -1
 
     def accept(self, visitor: ExprVisitor[T]) -> T:
         return visitor.visit_this_expr(self)
 
 
 class Super(Expr):
+    __slots__ = ("keyword", "method", "distance", "slot")
+
     def __init__(self, keyword: Token, method: Token):
         self.keyword = keyword
         self.method = method
+        self.distance = -1
+        self.slot = -1
 
     def accept(self, visitor: ExprVisitor[T]) -> T:
         return visitor.visit_super_expr(self)
@@ -208,3 +236,28 @@ Expr.Super = Super
 Expr.This = This
 Expr.Unary = Unary
 Expr.Variable = Variable
+
+# Node class -> name of the ExprVisitor method that handles it, for build_dispatch()
+EXPR_VISIT_METHODS = {
+    Assign: "visit_assign_expr",
+    Binary: "visit_binary_expr",
+    Call: "visit_call_expr",
+    Get: "visit_get_expr",
+    Grouping: "visit_grouping_expr",
+    Literal: "visit_literal_expr",
+    Logical: "visit_logical_expr",
+    Set: "visit_set_expr",
+    Super: "visit_super_expr",
+    This: "visit_this_expr",
+    Unary: "visit_unary_expr",
+    Variable: "visit_variable_expr",
+}
+
+
+def build_dispatch(visitor: Any, visit_methods: Dict[type, str]) -> Dict[type, Callable[[Any], Any]]:
+    """
+    Map each node class to the visitor's bound visit method.
+    Visitors look up type(node) in this instead of calling node.accept(visitor),
+    skipping the accept() -> visit_*() bounce on every node.
+    """
+    return {cls: getattr(visitor, name) for cls, name in visit_methods.items()}
@@ -1,12 +1,20 @@
-from typing import Any, List, Dict, Optional
+from typing import Any, Callable, List, Dict, Optional, TextIO
 import time
 from .token_type import Token, TokenType
-from .expressions import Expr, ExprVisitor
-from .statements import Stmt, StmtVisitor
+from .expressions import EXPR_VISIT_METHODS, Expr, ExprVisitor, build_dispatch
+from .statements import STMT_VISIT_METHODS, Stmt, StmtVisitor
 from .environment import Environment
 
+# Token types checked while evaluating, bound once so the hot paths read a module global
+# instead of a TokenType attribute. Tokens hold these same int objects, so `is` compares them.
+_MINUS = TokenType.MINUS
+_BANG = TokenType.BANG
+_OR = TokenType.OR
+
 
 class LoxCallable:
+    __slots__ = ()
+
     def arity(self) -> int:
         """Number of args accepted."""
         raise NotImplementedError
@@ -17,6 +25,8 @@ class LoxCallable:
 
 
 class ClockFunction(LoxCallable):
+    __slots__ = ()
+
     def arity(self) -> int:
         return 0
 
@@ -30,6 +40,8 @@ class ClockFunction(LoxCallable):
 class LoxFunction(LoxCallable):
     """Used for both functions and methods"""
 
+    __slots__ = ("declaration", "closure", "is_initializer", "_env_pool")
+
     def __init__(
         self,
         declaration: Stmt.Function,
@@ -41,6 +53,8 @@ class LoxFunction(LoxCallable):
         # So we can look up variables in that environment
         self.closure = closure
         self.is_initializer = is_initializer
+        # Spare call environments, reused when nothing can outlive a call (see Stmt.Function.leaf)
+        self._env_pool: List[Environment] = []
 
     # Only used for methods - which are just funcs bound to a class instance
     def bind(self, instance: "LoxInstance") -> "LoxFunction":
@@ -52,30 +66,42 @@ class LoxFunction(LoxCallable):
         return len(self.declaration.params)
 
     def call(self, interpreter: "Interpreter", arguments: List[Any]) -> Any:
-        environment = Environment(self.closure)
+        leaf = self.declaration.leaf
+        if leaf and self._env_pool:
+            # Every pooled env already encloses self.closure; only its locals need replacing
+            environment = self._env_pool.pop()
+        else:
+            environment = Environment(self.closure)
 
-        # Parameters are stored in the env, as local variables
-        for i, param in enumerate(self.declaration.params):
-            environment.define(param.lexeme, arguments[i])
+        # Parameters are stored in the env, as local variables.
+        # The Resolver gives them the first slots, in order, so the args list is the slot list.
+        environment.slots = list(arguments)
 
         try:
             interpreter.execute_block(self.declaration.body, environment)
-        except ReturnException as return_value:
-            # Special case for constructors
-            if self.is_initializer:
-                return self.closure.get_at(0, "this")
-            return return_value.value
+        finally:
+            if leaf:
+                self._env_pool.append(environment)
+
+        value = None
+        if interpreter.returning:
+            value = interpreter.return_value
+            interpreter.returning = False
+            interpreter.return_value = None
 
+        # Special case for constructors; bind() puts "this" in slot 0 of the closure
         if self.is_initializer:
-            return self.closure.get_at(0, "this")
+            return self.closure.get_at(0, 0)
 
-        return None
+        return value
 
     def __str__(self) -> str:
         return f"<fn {self.declaration.name.lexeme}>"
 
 
 class LoxClass(LoxCallable):
+    __slots__ = ("name", "superclass", "methods", "_flat_methods")
+
     def __init__(
         self,
         name: str,
@@ -86,14 +112,15 @@ class LoxClass(LoxCallable):
         self.superclass = superclass
         self.methods = methods
 
-    def find_method(self, name: str) -> Optional[LoxFunction]:
-        if name in self.methods:
-            return self.methods[name]
-
-        if self.superclass is not None:
-            return self.superclass.find_method(name)
+        # Inherited methods merged with our own, so lookup is one dict probe at any depth.
+        # Classes can't change once defined, so this never needs invalidating.
+        self._flat_methods: Dict[str, LoxFunction] = (
+            dict(superclass._flat_methods) if superclass is not None else {}
+        )
+        self._flat_methods.update(methods)
 
-        return None
+    def find_method(self, name: str) -> Optional[LoxFunction]:
+        return self._flat_methods.get(name)
 
     def arity(self) -> int:
         initializer = self.find_method("init")
@@ -115,17 +142,27 @@ class LoxClass(LoxCallable):
 class LoxInstance:
     """Instance of a Lox class."""
 
+    __slots__ = ("klass", "fields", "_bound_cache")
+
     def __init__(self, klass: LoxClass):
         self.klass = klass
         self.fields: Dict[str, Any] = {}
+        # Methods already bound to this instance, so each access doesn't bind a new function
+        self._bound_cache: Dict[str, LoxFunction] = {}
 
     def get(self, name: Token) -> Any:
         if name.lexeme in self.fields:
             return self.fields[name.lexeme]
 
+        bound = self._bound_cache.get(name.lexeme)
+        if bound is not None:
+            return bound
+
         method = self.klass.find_method(name.lexeme)
         if method is not None:
-            return method.bind(self)
+            bound = method.bind(self)
+            self._bound_cache[name.lexeme] = bound
+            return bound
 
         raise RuntimeError(name, f"Undefined property '{name.lexeme}'.")
 
@@ -142,23 +179,24 @@ class RuntimeError(Exception):
         self.token = token
 
 
-class ReturnException(Exception):
-    """
-    Not actually an exception; used for flow control.
-    All `return` statements throw this, unwinding the stack, exiting deeply-nested logic.
-    We catch it higher in the stack and then return that thrown value.
-    """
-
-    def __init__(self, value: Any):
-        super().__init__()
-        self.value = value
+class Interpreter(ExprVisitor[Any], StmtVisitor[None]):
+    def __init__(self, stdout: Optional[TextIO] = None):
+        # Sink for `print` output and runtime errors; see Lox.stdout
+        self.stdout = stdout
+        self.reset()
 
+        self._expr_dispatch = build_dispatch(self, EXPR_VISIT_METHODS)
+        self._stmt_dispatch = build_dispatch(self, STMT_VISIT_METHODS)
 
-class Interpreter(ExprVisitor[Any], StmtVisitor[None]):
-    def __init__(self):
+    def reset(self) -> None:
+        """Start over with fresh globals, as if newly constructed."""
         self.globals = Environment()
         self.environment = self.globals
-        self.locals: Dict[Expr, int] = {}
+
+        # Set by a `return` statement. Blocks and loops stop executing when they see it,
+        # unwinding back to LoxFunction.call without raising an exception.
+        self.returning = False
+        self.return_value: Any = None
 
         # Define built-in functions
         self.globals.define("clock", ClockFunction())
@@ -166,29 +204,38 @@ class Interpreter(ExprVisitor[Any], StmtVisitor[None]):
     def interpret(self, statements: List[Stmt]) -> None:
         try:
             for statement in statements:
-                if statement is not None:
-                    self.execute(statement)
+                self.execute(statement)
+                if self.returning:
+                    # A top-level `return`, which the Resolver has already reported
+                    self.returning = False
+                    self.return_value = None
+                    break
         except RuntimeError as error:
-            print(f"Runtime error at line {error.token.line}: {error}")
+            print(f"Runtime error at line {error.token.line}: {error}", file=self.stdout)
 
-    def resolve(self, expr: Expr, depth: int) -> None:
-        """Resolve a variable reference to a specific environment depth."""
-        self.locals[expr] = depth
+    def resolve(self, expr: Expr, depth: int, slot: int) -> None:
+        """Resolve a variable reference to a specific environment depth and slot."""
+        # Stored on the node itself, so the lookup at runtime is an attribute read
+        expr.distance = depth
+        expr.slot = slot
 
     def evaluate(self, expr: Expr) -> Any:
-        return expr.accept(self)
+        return self._expr_dispatch[type(expr)](expr)
 
     def execute(self, stmt: Stmt) -> None:
-        stmt.accept(self)
+        self._stmt_dispatch[type(stmt)](stmt)
 
     def execute_block(self, statements: List[Stmt], environment: Environment) -> None:
         previous = self.environment
         try:
             self.environment = environment
 
+            # The interpreter's inner loop: execute() inlined, with the dispatch table held in a local
+            dispatch = self._stmt_dispatch
             for statement in statements:
-                if statement is not None:
-                    self.execute(statement)
+                dispatch[type(statement)](statement)
+                if self.returning:
+                    break
         finally:
             self.environment = previous
 
@@ -201,87 +248,94 @@ class Interpreter(ExprVisitor[Any], StmtVisitor[None]):
     def visit_unary_expr(self, expr: Expr.Unary) -> Any:
         right = self.evaluate(expr.right)
 
-        if expr.operator.type == TokenType.MINUS:
+        operator_type = expr.operator.type
+        if operator_type is _MINUS:
             self.check_number_operand(expr.operator, right)
-            return -float(right)
-        elif expr.operator.type == TokenType.BANG:
+            return -right
+        elif operator_type is _BANG:
             return not self.is_truthy(right)
 
         # Unreachable
         return None
 
+    def resolve_operator(self, expr: Expr.Binary) -> None:
+        """Bind a binary expression to its operator ahead of time, so evaluating it skips the token type checks."""
+        expr.op = BINARY_OPERATORS[expr.operator.type]
+
     def visit_binary_expr(self, expr: Expr.Binary) -> Any:
-        left = self.evaluate(expr.left)
-        right = self.evaluate(expr.right)
+        return expr.op(
+            self, expr.operator, self.evaluate(expr.left), self.evaluate(expr.right)
+        )
+
+    # Binary operators - each checks its own operand types
+    # Math
+    def subtract(self, operator: Token, left: Any, right: Any) -> Any:
+        self.check_number_operands(operator, left, right)
+        return left - right
+
+    def add(self, operator: Token, left: Any, right: Any) -> Any:
+        if type(left) is float and type(right) is float:
+            return left + right
+        elif isinstance(left, str) or isinstance(right, str):
+            # If either operand is a string, convert both to strings and concatenate
+            return self.stringify(left) + self.stringify(right)
+        else:
+            raise RuntimeError(
+                operator,
+                "Operands must be two numbers or at least one string.",
+            )
 
-        operator_type = expr.operator.type
+    def divide(self, operator: Token, left: Any, right: Any) -> Any:
+        self.check_number_operands(operator, left, right)
+        if right == 0:
+            raise RuntimeError(operator, "Division by zero.")
+        return left / right
 
-        # Math
-        if operator_type == TokenType.MINUS:
-            self.check_number_operands(expr.operator, left, right)
-            return float(left) - float(right)
-        elif operator_type == TokenType.PLUS:
-            if isinstance(left, float) and isinstance(right, float):
-                return left + right
-            elif isinstance(left, str) or isinstance(right, str):
-                # If either operand is a string, convert both to strings and concatenate
-                return self.stringify(left) + self.stringify(right)
-            else:
-                raise RuntimeError(
-                    expr.operator,
-                    "Operands must be two numbers or at least one string.",
-                )
-        elif operator_type == TokenType.SLASH:
-            self.check_number_operands(expr.operator, left, right)
-            if float(right) == 0:
-                raise RuntimeError(expr.operator, "Division by zero.")
-            return float(left) / float(right)
-        elif operator_type == TokenType.STAR:
-            self.check_number_operands(expr.operator, left, right)
-            return float(left) * float(right)
-
-        # Comparison
-        elif operator_type == TokenType.GREATER:
-            self.check_number_operands(expr.operator, left, right)
-            return float(left) > float(right)
-        elif operator_type == TokenType.GREATER_EQUAL:
-            self.check_number_operands(expr.operator, left, right)
-            return float(left) >= float(right)
-        elif operator_type == TokenType.LESS:
-            self.check_number_operands(expr.operator, left, right)
-            return float(left) < float(right)
-        elif operator_type == TokenType.LESS_EQUAL:
-            self.check_number_operands(expr.operator, left, right)
-            return float(left) <= float(right)
-
-        # Equality
-        elif operator_type == TokenType.BANG_EQUAL:
-            return not self.is_equal(left, right)
-        elif operator_type == TokenType.EQUAL_EQUAL:
-            return self.is_equal(left, right)
+    def multiply(self, operator: Token, left: Any, right: Any) -> Any:
+        self.check_number_operands(operator, left, right)
+        return left * right
 
-        return None
+    # Comparison
+    def greater(self, operator: Token, left: Any, right: Any) -> Any:
+        self.check_number_operands(operator, left, right)
+        return left > right
+
+    def greater_equal(self, operator: Token, left: Any, right: Any) -> Any:
+        self.check_number_operands(operator, left, right)
+        return left >= right
+
+    def less(self, operator: Token, left: Any, right: Any) -> Any:
+        self.check_number_operands(operator, left, right)
+        return left < right
+
+    def less_equal(self, operator: Token, left: Any, right: Any) -> Any:
+        self.check_number_operands(operator, left, right)
+        return left <= right
+
+    # Equality
+    def not_equal(self, operator: Token, left: Any, right: Any) -> Any:
+        return not self.is_equal(left, right)
+
+    def equal(self, operator: Token, left: Any, right: Any) -> Any:
+        return self.is_equal(left, right)
 
     def check_number_operand(self, operator: Token, operand: Any) -> None:
-        if not isinstance(operand, float):
+        if type(operand) is not float:
             raise RuntimeError(operator, "Operand must be a number.")
 
     def check_number_operands(self, operator: Token, left: Any, right: Any) -> None:
-        if not isinstance(left, float) or not isinstance(right, float):
+        if type(left) is not float or type(right) is not float:
             raise RuntimeError(operator, "Operands must be numbers.")
 
     def is_truthy(self, obj: Any) -> bool:
         """Truthiness: Like Ruby, nil and false are falsy."""
-        if obj is None:
-            return False
-        if isinstance(obj, bool):
-            return obj
-        return True
+        return obj is not None and obj is not False
 
     def is_equal(self, a: Any, b: Any) -> bool:
-        if a is None and b is None:
+        # Same object means equal, except for NaN, which never equals itself
+        if a is b and type(a) is not float:
             return True
-        if a is None:
+        if a is None or b is None:
             return False
         return a == b
 
@@ -289,10 +343,10 @@ class Interpreter(ExprVisitor[Any], StmtVisitor[None]):
         if obj is None:
             return "nil"
 
-        if isinstance(obj, bool):
+        if type(obj) is bool:
             return str(obj).lower()
 
-        if isinstance(obj, float):
+        if type(obj) is float:
             text = str(obj)
             # Remove trailing .0 for whole numbers
             if text.endswith(".0"):
@@ -312,7 +366,7 @@ class Interpreter(ExprVisitor[Any], StmtVisitor[None]):
             if not isinstance(superclass, LoxClass):
                 raise RuntimeError(stmt.superclass.name, "Superclass must be a class.")
 
-        self.environment.define(stmt.name.lexeme, None)
+        slot = self.environment.define(stmt.name.lexeme, None)
 
         if stmt.superclass is not None:
             self.environment = Environment(self.environment)
@@ -330,7 +384,10 @@ class Interpreter(ExprVisitor[Any], StmtVisitor[None]):
         if superclass is not None:
             self.environment = self.environment.enclosing
 
-        self.environment.assign(stmt.name, klass)
+        if slot is None:
+            self.environment.assign(stmt.name, klass)
+        else:
+            self.environment.slots[slot] = klass
 
     def visit_expression_stmt(self, stmt: Stmt.Expression) -> None:
         self.evaluate(stmt.expression)
@@ -340,21 +397,32 @@ class Interpreter(ExprVisitor[Any], StmtVisitor[None]):
         self.environment.define(stmt.name.lexeme, function)
 
     def visit_if_stmt(self, stmt: Stmt.If) -> None:
-        if self.is_truthy(self.evaluate(stmt.condition)):
+        # is_truthy() inlined: only nil and false are falsy
+        condition = self.evaluate(stmt.condition)
+        if condition is not None and condition is not False:
             self.execute(stmt.then_branch)
         elif stmt.else_branch is not None:
             self.execute(stmt.else_branch)
 
     def visit_print_stmt(self, stmt: Stmt.Print) -> None:
-        value = self.evaluate(stmt.expression)
-        print(self.stringify(value))
+        expression = stmt.expression
+        if type(expression) is Expr.Literal:
+            # A literal always prints the same text, so format it once
+            text = expression.text
+            if text is None:
+                text = expression.text = self.stringify(expression.value)
+            print(text, file=self.stdout)
+            return
+        value = self.evaluate(expression)
+        print(self.stringify(value), file=self.stdout)
 
     def visit_return_stmt(self, stmt: Stmt.Return) -> None:
         value = None
         if stmt.value is not None:
             value = self.evaluate(stmt.value)
 
-        raise ReturnException(value)
+        self.return_value = value
+        self.returning = True
 
     def visit_var_stmt(self, stmt: Stmt.Var) -> None:
         value = None
@@ -364,15 +432,73 @@ class Interpreter(ExprVisitor[Any], StmtVisitor[None]):
         self.environment.define(stmt.name.lexeme, value)
 
     def visit_while_stmt(self, stmt: Stmt.While) -> None:
-        while self.is_truthy(self.evaluate(stmt.condition)):
-            self.execute(stmt.body)
+        # Looked up once per loop rather than once per iteration
+        condition, body = stmt.condition, stmt.body
+        evaluate, execute = self.evaluate, self.execute
+
+        # A literal condition (like the `true` of a bare `for (;;)`) can't change; don't re-check it
+        if type(condition) is Expr.Literal:
+            if not self.is_truthy(condition.value):
+                return
+            while True:
+                execute(body)
+                if self.returning:
+                    return
+
+        while True:
+            # is_truthy() inlined, since this runs on every iteration
+            value = evaluate(condition)
+            if value is None or value is False:
+                return
+            execute(body)
+            if self.returning:
+                return
+
+    def visit_for_stmt(self, stmt: Stmt.For) -> None:
+        initializer = stmt.initializer
+        if type(initializer) is not Stmt.Var:
+            # No loop variable, so no environment of its own, matching the Resolver
+            if initializer is not None:
+                self.execute(initializer)
+            self.run_for_loop(stmt)
+            return
+
+        # One environment for the whole loop: every iteration shares the loop variable
+        previous = self.environment
+        try:
+            self.environment = Environment(previous)
+            self.execute(initializer)
+            self.run_for_loop(stmt)
+        finally:
+            self.environment = previous
+
+    def run_for_loop(self, stmt: Stmt.For) -> None:
+        # Looked up once per loop rather than once per iteration
+        condition, body, increment = stmt.condition, stmt.body, stmt.increment
+        evaluate, execute = self.evaluate, self.execute
+
+        # The `true` that stands in for an omitted condition never needs re-checking
+        if type(condition) is Expr.Literal:
+            if not self.is_truthy(condition.value):
+                return
+            condition = None
+
+        while True:
+            if condition is not None:
+                value = evaluate(condition)
+                if value is None or value is False:
+                    return
+            execute(body)
+            if self.returning:
+                return
+            if increment is not None:
+                evaluate(increment)
 
     def visit_assign_expr(self, expr: Expr.Assign) -> Any:
         value = self.evaluate(expr.value)
 
-        distance = self.locals.get(expr)
-        if distance is not None:
-            self.environment.assign_at(distance, expr.name, value)
+        if expr.distance >= 0:
+            self.environment.assign_at(expr.distance, expr.slot, value)
         else:
             self.globals.assign(expr.name, value)
 
@@ -383,20 +509,20 @@ class Interpreter(ExprVisitor[Any], StmtVisitor[None]):
 
     def lookup_variable(self, name: Token, expr: Expr) -> Any:
         """Look up a variable in the appropriate environment."""
-        distance = self.locals.get(expr)
-        if distance is not None:
-            return self.environment.get_at(distance, name.lexeme)
+        if expr.distance >= 0:
+            return self.environment.get_at(expr.distance, expr.slot)
         else:
             return self.globals.get(name)
 
     def visit_logical_expr(self, expr: Expr.Logical) -> Any:
         left = self.evaluate(expr.left)
 
-        if expr.operator.type == TokenType.OR:
-            if self.is_truthy(left):
+        # is_truthy() inlined
+        if expr.operator.type is _OR:
+            if left is not None and left is not False:
                 return left
         else:  # AND
-            if not self.is_truthy(left):
+            if left is None or left is False:
                 return left
 
         return self.evaluate(expr.right)
@@ -404,9 +530,8 @@ class Interpreter(ExprVisitor[Any], StmtVisitor[None]):
     def visit_call_expr(self, expr: Expr.Call) -> Any:
         callee = self.evaluate(expr.callee)
 
-        arguments = []
-        for argument in expr.arguments:
-            arguments.append(self.evaluate(argument))
+        evaluate = self.evaluate
+        arguments = [evaluate(argument) for argument in expr.arguments]
 
         if not isinstance(callee, LoxCallable):
             raise RuntimeError(expr.paren, "Can only call functions and classes.")
@@ -437,11 +562,11 @@ class Interpreter(ExprVisitor[Any], StmtVisitor[None]):
         return value
 
     def visit_super_expr(self, expr: Expr.Super) -> Any:
-        distance = self.locals[expr]
-        superclass = self.environment.get_at(distance, "super")
+        distance = expr.distance
+        superclass = self.environment.get_at(distance, expr.slot)
 
-        # "this" is always one level nearer than "super"
-        obj = self.environment.get_at(distance - 1, "this")
+        # "this" is always one level nearer than "super", in that environment's only slot
+        obj = self.environment.get_at(distance - 1, 0)
 
         method = superclass.find_method(expr.method.lexeme)
 
@@ -454,3 +579,18 @@ class Interpreter(ExprVisitor[Any], StmtVisitor[None]):
 
     def visit_this_expr(self, expr: Expr.This) -> Any:
         return self.lookup_variable(expr.keyword, expr)
+
+
+# Token type -> implementation, resolved onto each Binary node before it runs
+BINARY_OPERATORS: Dict[int, Callable[[Interpreter, Token, Any, Any], Any]] = {
+    TokenType.MINUS: Interpreter.subtract,
+    TokenType.PLUS: Interpreter.add,
+    TokenType.SLASH: Interpreter.divide,
+    TokenType.STAR: Interpreter.multiply,
+    TokenType.GREATER: Interpreter.greater,
+    TokenType.GREATER_EQUAL: Interpreter.greater_equal,
+    TokenType.LESS: Interpreter.less,
+    TokenType.LESS_EQUAL: Interpreter.less_equal,
+    TokenType.BANG_EQUAL: Interpreter.not_equal,
+    TokenType.EQUAL_EQUAL: Interpreter.equal,
+}
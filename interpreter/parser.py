@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import Callable, Dict, Iterable, List, Optional, TextIO
 from .token_type import Token, TokenType
 from .expressions import Expr
 from .statements import Stmt
@@ -8,28 +8,93 @@ class ParseError(Exception):
     pass
 
 
-class Parser:
-    """Recursive descent parser"""
+# Binary operator precedence levels, loosest first
+EQUALITY, COMPARISON, TERM, FACTOR = range(4)
+
+BINARY_PRECEDENCE: Dict[int, int] = {
+    TokenType.BANG_EQUAL: EQUALITY,
+    TokenType.EQUAL_EQUAL: EQUALITY,
+    TokenType.GREATER: COMPARISON,
+    TokenType.GREATER_EQUAL: COMPARISON,
+    TokenType.LESS: COMPARISON,
+    TokenType.LESS_EQUAL: COMPARISON,
+    TokenType.MINUS: TERM,
+    TokenType.PLUS: TERM,
+    TokenType.SLASH: FACTOR,
+    TokenType.STAR: FACTOR,
+}
+
+# Literal nodes are never mutated by later passes, so equal literals can share one node
+_LITERAL_TRUE = Expr.Literal(True)
+_LITERAL_FALSE = Expr.Literal(False)
+_LITERAL_NIL = Expr.Literal(None)
+
+# Shared nodes for integer-valued numbers, filled in as they're parsed
+_NUMBER_LITERALS: Dict[float, Expr.Literal] = {}
+_NUMBER_LITERALS_MAX = 256
+
+# Tokens that can start a primary expression
+PRIMARY_STARTS = frozenset(
+    {
+        TokenType.IDENTIFIER,
+        TokenType.NUMBER,
+        TokenType.STRING,
+        TokenType.FALSE,
+        TokenType.TRUE,
+        TokenType.NIL,
+        TokenType.SUPER,
+        TokenType.THIS,
+        TokenType.LEFT_PAREN,
+    }
+)
+
+# Tokens that start a statement, where error recovery can resume parsing
+SYNC_POINTS = frozenset(
+    {
+        TokenType.CLASS,
+        TokenType.FUN,
+        TokenType.VAR,
+        TokenType.FOR,
+        TokenType.IF,
+        TokenType.WHILE,
+        TokenType.PRINT,
+        TokenType.RETURN,
+    }
+)
 
-    def __init__(self, tokens: List[Token]):
-        self.tokens = tokens
-        self.current = 0
 
-    def parse(self) -> List[Optional[Stmt]]:
-        """Tokens -> Statements."""
+class Parser:
+    """Recursive descent parser
+
+    Tokens are pulled one at a time, so the Scanner's stream_tokens() can feed the
+    parser directly without a token list in between; a token list works too. The
+    grammar needs one token of lookahead, plus the token consumed last.
+    """
+
+    def __init__(self, tokens: Iterable[Token], stdout: Optional[TextIO] = None):
+        self._next_token: Callable[[], Token] = iter(tokens).__next__
+        self.token: Token = self._next_token()  # The lookahead, not yet consumed
+        self.previous_token: Optional[Token] = None
+        self.had_error = False
+        self.stdout = stdout  # Error sink; see Lox.stdout
+
+    def parse(self) -> List[Stmt]:
+        """Tokens -> Statements. Declarations that failed to parse are left out."""
         statements = []
         while not self.is_at_end():
-            statements.append(self.declaration())
+            statement = self.declaration()
+            if statement is not None:
+                statements.append(statement)
         return statements
 
     def declaration(self) -> Optional[Stmt]:
         """Declarations introduce new names to the current scope."""
         try:
-            if self.match(TokenType.CLASS):
+            if self.match1(TokenType.CLASS):
                 return self.class_declaration()
-            if self.match(TokenType.FUN):
+            if self.match1(TokenType.FUN):
                 return self.function("function")
-            if self.match(TokenType.VAR):
+            if self.match1(TokenType.VAR):
                 return self.var_declaration()
 
             return self.statement()
@@ -41,7 +106,7 @@ class Parser:
         name = self.consume(TokenType.IDENTIFIER, "Expected class name.")
 
         superclass = None
-        if self.match(TokenType.LESS):
+        if self.match1(TokenType.LESS):
             self.consume(TokenType.IDENTIFIER, "Expected superclass name.")
             superclass = Expr.Variable(self.previous())
 
@@ -63,7 +128,7 @@ class Parser:
             parameters.append(
                 self.consume(TokenType.IDENTIFIER, "Expected parameter name.")
             )
-            while self.match(TokenType.COMMA):
+            while self.match1(TokenType.COMMA):
                 if len(parameters) >= 255:
                     self.error(self.peek(), "Can't have more than 255 parameters.")
                 parameters.append(
@@ -80,24 +145,24 @@ class Parser:
         name = self.consume(TokenType.IDENTIFIER, "Expected variable name.")
 
         initializer = None
-        if self.match(TokenType.EQUAL):
+        if self.match1(TokenType.EQUAL):
             initializer = self.expression()
 
         self.consume(TokenType.SEMICOLON, "Expected ';' after variable declaration.")
         return Stmt.Var(name, initializer)
 
     def statement(self) -> Stmt:
-        if self.match(TokenType.FOR):
+        if self.match1(TokenType.FOR):
             return self.for_statement()
-        if self.match(TokenType.IF):
+        if self.match1(TokenType.IF):
             return self.if_statement()
-        if self.match(TokenType.PRINT):
+        if self.match1(TokenType.PRINT):
             return self.print_statement()
-        if self.match(TokenType.RETURN):
+        if self.match1(TokenType.RETURN):
             return self.return_statement()
-        if self.match(TokenType.WHILE):
+        if self.match1(TokenType.WHILE):
             return self.while_statement()
-        if self.match(TokenType.LEFT_BRACE):
+        if self.match1(TokenType.LEFT_BRACE):
             return Stmt.Block(self.block())
 
         return self.expression_statement()
@@ -107,9 +172,9 @@ class Parser:
 
         # initializer, condition, increment pattern
         # We can perform declarations inside the for loop condition, like for (var i = 0; ...)
-        if self.match(TokenType.SEMICOLON):
+        if self.match1(TokenType.SEMICOLON):
             initializer = None
-        elif self.match(TokenType.VAR):
+        elif self.match1(TokenType.VAR):
             initializer = self.var_declaration()
         else:
             initializer = self.expression_statement()
@@ -126,17 +191,10 @@ class Parser:
 
         body = self.statement()
 
-        if increment is not None:
-            body = Stmt.Block([body, Stmt.Expression(increment)])
-
         if condition is None:
-            condition = Expr.Literal(True)
-        body = Stmt.While(condition, body)
+            condition = _LITERAL_TRUE
 
-        if initializer is not None:
-            body = Stmt.Block([initializer, body])
-
-        return body
+        return Stmt.For(initializer, condition, increment, body)
 
     def if_statement(self) -> Stmt:
         self.consume(TokenType.LEFT_PAREN, "Expected '(' after 'if'.")
@@ -145,7 +203,7 @@ class Parser:
 
         then_branch = self.statement()
         else_branch = None
-        if self.match(TokenType.ELSE):
+        if self.match1(TokenType.ELSE):
             else_branch = self.statement()
 
         return Stmt.If(condition, then_branch, else_branch)
@@ -175,8 +233,13 @@ class Parser:
     def block(self) -> List[Stmt]:
         statements = []
 
-        while not self.check(TokenType.RIGHT_BRACE) and not self.is_at_end():
-            statements.append(self.declaration())
+        while (
+            self.token.type is not TokenType.RIGHT_BRACE
+            and self.token.type is not TokenType.EOF
+        ):
+            statement = self.declaration()
+            if statement is not None:
+                statements.append(statement)
 
         self.consume(TokenType.RIGHT_BRACE, "Expected '}' after block.")
         return statements
@@ -192,7 +255,7 @@ class Parser:
     def assignment(self) -> Expr:
         expr = self.or_expr()
 
-        if self.match(TokenType.EQUAL):
+        if self.match1(TokenType.EQUAL):
             equals = self.previous()
             value = self.assignment()
 
@@ -206,80 +269,58 @@ class Parser:
 
         return expr
 
+    # The expression methods below run for every operand, so they test the lookahead
+    # and advance past it inline instead of going through match1()/advance().
+
     # Logical expressions
     def or_expr(self) -> Expr:
         expr = self.and_expr()
 
-        while self.match(TokenType.OR):
-            operator = self.previous()
+        while self.token.type is TokenType.OR:
+            operator = self.previous_token = self.token
+            self.token = self._next_token()
             right = self.and_expr()
             expr = Expr.Logical(expr, operator, right)
 
         return expr
 
     def and_expr(self) -> Expr:
-        expr = self.equality()
+        expr = self.binary(EQUALITY)
 
-        while self.match(TokenType.AND):
-            operator = self.previous()
-            right = self.equality()
+        while self.token.type is TokenType.AND:
+            operator = self.previous_token = self.token
+            self.token = self._next_token()
+            right = self.binary(EQUALITY)
             expr = Expr.Logical(expr, operator, right)
 
         return expr
 
-    def equality(self) -> Expr:
-        """!= =="""
-        expr = self.comparison()
-
-        while self.match(TokenType.BANG_EQUAL, TokenType.EQUAL_EQUAL):
-            operator = self.previous()
-            right = self.comparison()
-            expr = Expr.Binary(expr, operator, right)
-
-        return expr
-
-    def comparison(self) -> Expr:
-        """> >= < <="""
-        expr = self.term()
-
-        while self.match(
-            TokenType.GREATER,
-            TokenType.GREATER_EQUAL,
-            TokenType.LESS,
-            TokenType.LESS_EQUAL,
-        ):
-            operator = self.previous()
-            right = self.term()
-            expr = Expr.Binary(expr, operator, right)
-
-        return expr
-
-    def term(self) -> Expr:
-        """- +"""
-        expr = self.factor()
-
-        while self.match(TokenType.MINUS, TokenType.PLUS):
-            operator = self.previous()
-            right = self.factor()
-            expr = Expr.Binary(expr, operator, right)
-
-        return expr
+    def binary(self, min_precedence: int) -> Expr:
+        """== != > >= < <= - + / *
 
-    def factor(self) -> Expr:
-        """/ *"""
+        Precedence climbing: one loop covers every binary level, instead of a
+        method per level that each leaf expression would have to pass through.
+        """
         expr = self.unary()
 
-        while self.match(TokenType.SLASH, TokenType.STAR):
-            operator = self.previous()
-            right = self.unary()
+        while True:
+            operator = self.token
+            precedence = BINARY_PRECEDENCE.get(operator.type)
+            if precedence is None or precedence < min_precedence:
+                return expr
+            self.previous_token = operator
+            self.token = self._next_token()
+            # All binary operators are left-associative, so the right operand binds tighter
+            right = self.binary(precedence + 1)
             expr = Expr.Binary(expr, operator, right)
 
-        return expr
-
     def unary(self) -> Expr:
         """! -"""
-        if self.match(TokenType.BANG, TokenType.MINUS):
-            operator = self.previous()
+        operator = self.token
+        token_type = operator.type
+        if token_type is TokenType.BANG or token_type is TokenType.MINUS:
+            self.previous_token = operator
+            self.token = self._next_token()
             right = self.unary()
             return Expr.Unary(operator, right)
 
@@ -290,9 +331,12 @@ class Parser:
         expr = self.primary()
 
         while True:
-            if self.match(TokenType.LEFT_PAREN):
+            token_type = self.token.type
+            if token_type is TokenType.LEFT_PAREN:
+                self.advance()
                 expr = self.finish_call(expr)
-            elif self.match(TokenType.DOT):
+            elif token_type is TokenType.DOT:
+                self.advance()
                 name = self.consume(
                     TokenType.IDENTIFIER, "Expected property name after '.'."
                 )
@@ -306,9 +350,10 @@ class Parser:
         """Parse function call arguments."""
         arguments = []
 
-        if not self.check(TokenType.RIGHT_PAREN):
+        if self.token.type is not TokenType.RIGHT_PAREN:
             arguments.append(self.expression())
-            while self.match(TokenType.COMMA):
+            while self.token.type is TokenType.COMMA:
+                self.advance()
                 if len(arguments) >= 255:
                     self.error(self.peek(), "Can't have more than 255 arguments.")
                 arguments.append(self.expression())
@@ -318,72 +363,97 @@ class Parser:
 
     def primary(self) -> Expr:
         """Parse primary expressions: literals, grouping, variables"""
-        if self.match(TokenType.FALSE):
-            return Expr.Literal(False)
+        token = self.token
+        token_type = token.type
+        if token_type not in PRIMARY_STARTS:
+            # Leave the token unconsumed; error recovery starts by skipping it
+            raise self.error(token, "Expected expression.")
+        self.previous_token = token
+        self.token = self._next_token()
 
-        if self.match(TokenType.TRUE):
-            return Expr.Literal(True)
+        # Names and literals are the most common operands, so they're tested first
+        if token_type is TokenType.IDENTIFIER:
+            return Expr.Variable(token)
 
-        if self.match(TokenType.NIL):
-            return Expr.Literal(None)
+        if token_type is TokenType.NUMBER:
+            return self.number_literal(token.literal)
 
-        if self.match(TokenType.NUMBER, TokenType.STRING):
-            return Expr.Literal(self.previous().literal)
+        if token_type is TokenType.STRING:
+            return Expr.Literal(token.literal)
 
-        if self.match(TokenType.SUPER):
-            keyword = self.previous()
+        if token_type is TokenType.FALSE:
+            return _LITERAL_FALSE
+
+        if token_type is TokenType.TRUE:
+            return _LITERAL_TRUE
+
+        if token_type is TokenType.NIL:
+            return _LITERAL_NIL
+
+        if token_type is TokenType.SUPER:
             self.consume(TokenType.DOT, "Expected '.' after 'super'.")
             method = self.consume(
                 TokenType.IDENTIFIER, "Expected superclass method name."
             )
-            return Expr.Super(keyword, method)
-
-        if self.match(TokenType.THIS):
-            return Expr.This(self.previous())
-
-        if self.match(TokenType.IDENTIFIER):
-            return Expr.Variable(self.previous())
+            return Expr.Super(token, method)
 
-        if self.match(TokenType.LEFT_PAREN):
-            expr = self.expression()
-            self.consume(TokenType.RIGHT_PAREN, "Expected ')' after expression.")
-            return Expr.Grouping(expr)
+        if token_type is TokenType.THIS:
+            return Expr.This(token)
 
-        raise self.error(self.peek(), "Expected expression.")
-
-    def match(self, *types: TokenType) -> bool:
-        for token_type in types:
-            if self.check(token_type):
-                self.advance()
-                return True
+        # The only start left is the '(' of a grouping
+        expr = self.expression()
+        self.consume(TokenType.RIGHT_PAREN, "Expected ')' after expression.")
+        return Expr.Grouping(expr)
+
+    def number_literal(self, value: float) -> Expr.Literal:
+        literal = _NUMBER_LITERALS.get(value)
+        if literal is None:
+            literal = Expr.Literal(value)
+            # Small whole numbers (counters, indices, 0 and 1) repeat the most
+            if value.is_integer() and len(_NUMBER_LITERALS) < _NUMBER_LITERALS_MAX:
+                _NUMBER_LITERALS[value] = literal
+        return literal
+
+    # Single-type matcher; the stream always ends in EOF, so the lookahead can be
+    # read without checking for the end first
+    def match1(self, token_type: int) -> bool:
+        if self.token.type is token_type:
+            self.advance()
+            return True
         return False
 
-    def check(self, token_type: TokenType) -> bool:
-        if self.is_at_end():
-            return False
-        return self.peek().type == token_type
+    def check(self, token_type: int) -> bool:
+        return self.token.type is token_type
 
     def advance(self) -> Token:
-        if not self.is_at_end():
-            self.current += 1
-        return self.previous()
+        token = self.token
+        if token.type is not TokenType.EOF:
+            self.previous_token = token
+            self.token = self._next_token()
+        return self.previous_token
 
     def is_at_end(self) -> bool:
-        return self.peek().type == TokenType.EOF
+        return self.token.type is TokenType.EOF
 
     def peek(self) -> Token:
-        return self.tokens[self.current]
+        return self.token
 
     def previous(self) -> Token:
-        return self.tokens[self.current - 1]
-
-    def consume(self, token_type: TokenType, message: str) -> Token:
-        if self.check(token_type):
-            return self.advance()
-        raise self.error(self.peek(), message)
+        return self.previous_token
+
+    def consume(self, token_type: int, message: str) -> Token:
+        # The expected token is almost always there, so take it without the
+        # check()/advance() calls; it's never EOF, so there's no end-of-input test either
+        token = self.token
+        if token.type is token_type:
+            self.previous_token = token
+            self.token = self._next_token()
+            return token
+        raise self.error(token, message)
 
     def error(self, token: Token, message: str) -> ParseError:
-        print(f"Parse error at line {token.line}: {message}")
+        print(f"Parse error at line {token.line}: {message}", file=self.stdout)
+        self.had_error = True
         return ParseError()
 
     def synchronize(self) -> None:
@@ -391,19 +461,10 @@ class Parser:
         # Error recovery: After we hit a parse error, skip past it and continue parsing at the next sync point.
         self.advance()
         while not self.is_at_end():
-            if self.previous().type == TokenType.SEMICOLON:
+            if self.previous_token.type is TokenType.SEMICOLON:
                 return
 
-            if self.peek().type in [
-                TokenType.CLASS,
-                TokenType.FUN,
-                TokenType.VAR,
-                TokenType.FOR,
-                TokenType.IF,
-                TokenType.WHILE,
-                TokenType.PRINT,
-                TokenType.RETURN,
-            ]:
+            if self.token.type in SYNC_POINTS:
                 return
 
             self.advance()
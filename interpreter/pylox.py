@@ -1,19 +1,48 @@
 #!/usr/bin/env python3
 
 import sys
-from typing import List
+from collections import OrderedDict
+from hashlib import blake2b
+from typing import List, Optional, TextIO
 
 from .scanner import Scanner
 from .parser import Parser
 from .interpreter import Interpreter
 from .resolver import Resolver
+from .statements import Stmt
 
 
 class Lox:
+    # How many distinct sources keep their parsed statements around
+    CACHE_SIZE = 128
+
     def __init__(self):
         self.interpreter = Interpreter()
         self.had_error = False
         self.had_runtime_error = False
+        # Source digest -> statements, for sources that scanned and parsed without errors.
+        # Resolving and running only fill in per-node results, so statements can run again as is.
+        # Kept in least recently used order, so the front entry is the one to evict.
+        self._cache: OrderedDict[bytes, List[Stmt]] = OrderedDict()
+
+    @property
+    def stdout(self) -> Optional[TextIO]:
+        """
+        Where program output and error messages go. The scanner, parser, resolver and
+        interpreter all print here. None means whatever sys.stdout is at print time,
+        so redirect_stdout() still captures output.
+        """
+        return self.interpreter.stdout
+
+    @stdout.setter
+    def stdout(self, stdout: Optional[TextIO]) -> None:
+        self.interpreter.stdout = stdout
+
+    def reset(self) -> None:
+        """Drop globals and error flags from earlier runs, keeping the statement cache."""
+        self.interpreter.reset()
+        self.had_error = False
+        self.had_runtime_error = False
 
     def main(self, args: List[str]) -> None:
         if len(args) > 1:
@@ -57,19 +86,45 @@ class Lox:
                 break
 
     def run(self, source: str) -> None:
-        scanner = Scanner(source)
-        tokens = scanner.scan_tokens()
+        self.run_parsed(self.parse(source))
+
+    def parse(self, source: str) -> List[Stmt]:
+        """Scan and parse source into statements ready for run_parsed()."""
+        key = blake2b(source.encode(), digest_size=16).digest()
+        statements = self._cache.get(key)
+        if statements is not None:
+            # Seen before: skip scanning and parsing
+            self._cache.move_to_end(key)
+            return statements
+
+        scanner = Scanner(source, self.stdout)
 
-        parser = Parser(tokens)
+        # Tokens go straight from the scanner to the parser, never collected in a list
+        parser = Parser(scanner.stream_tokens(), self.stdout)
         statements = parser.parse()
 
+        # Sources with errors aren't cached, so a rerun prints the same error messages
+        if scanner.had_error or parser.had_error:
+            self.had_error = True
+        else:
+            if len(self._cache) >= self.CACHE_SIZE:
+                self._cache.popitem(last=False)  # Least recently used
+            self._cache[key] = statements
+
+        return statements
+
+    def run_parsed(self, statements: List[Stmt]) -> None:
+        """Resolve and interpret statements from parse(), e.g. after also visualizing them."""
         if self.had_error:
             return
 
+        # Resolving again is safe: it rewrites the same distances and slots on the nodes.
+        # Resolution errors aren't cached either, so every run reports them and stops.
         resolver = Resolver(self.interpreter)
         resolver.resolve_statements(statements)
 
-        if self.had_error:
+        if resolver.had_error:
+            self.had_error = True
             return
 
         self.interpreter.interpret(statements)
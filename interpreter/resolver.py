@@ -1,8 +1,9 @@
-from typing import List, Dict
+from collections import defaultdict
+from typing import DefaultDict, List, Optional
 from enum import Enum, auto
 from .token_type import Token
-from .expressions import Expr, ExprVisitor
-from .statements import Stmt, StmtVisitor
+from .expressions import EXPR_VISIT_METHODS, Expr, ExprVisitor, build_dispatch
+from .statements import STMT_VISIT_METHODS, Stmt, StmtVisitor
 from .interpreter import Interpreter
 
 
@@ -20,53 +21,101 @@ class ClassType(Enum):
     SUBCLASS = auto()
 
 
+class Binding:
+    """
+    A name declared in a local scope: the scope's depth, the slot the name occupies in the
+    scope's runtime Environment, and whether its initializer has finished resolving.
+    """
+
+    __slots__ = ("depth", "slot", "defined")
+
+    def __init__(self, depth: int, slot: int, defined: bool):
+        self.depth = depth
+        self.slot = slot
+        self.defined = defined
+
+
 class Resolver(ExprVisitor[None], StmtVisitor[None]):
     """Resolves variable scopes and tries to find errors via static analysis, before interpretation."""
 
     def __init__(self, interpreter: Interpreter):
         self.interpreter = interpreter
-        self.scopes: List[Dict[str, bool]] = []
+        # Every local binding of a name, innermost last, so a lookup is one dict probe
+        # however deeply scopes nest. Each scope lists the names it declared, in slot order.
+        self._bindings: DefaultDict[str, List[Binding]] = defaultdict(list)
+        self._scope_stack: List[List[str]] = []
         self.current_function = FunctionType.NONE
         self.current_class = ClassType.NONE
+        # Functions whose bodies we're inside of, innermost last
+        self.function_stack: List[Stmt.Function] = []
+        self.had_error = False
+        # Indices into _scope_stack of the innermost class's `this` scope and the innermost
+        # `super` scope. Those scopes hold nothing but slot 0, so no names are bound for them.
+        self._this_depth: Optional[int] = None
+        self._super_depth: Optional[int] = None
+
+        self._expr_dispatch = build_dispatch(self, EXPR_VISIT_METHODS)
+        self._stmt_dispatch = build_dispatch(self, STMT_VISIT_METHODS)
+
+    def error(self, message: str) -> None:
+        print(f"Error: {message}", file=self.interpreter.stdout)
+        self.had_error = True
 
     def resolve_statements(self, statements: List[Stmt]) -> None:
+        dispatch = self._stmt_dispatch
         for statement in statements:
-            if statement is not None:
-                self.resolve_stmt(statement)
+            dispatch[type(statement)](statement)
 
     def resolve_stmt(self, stmt: Stmt) -> None:
-        stmt.accept(self)
+        self._stmt_dispatch[type(stmt)](stmt)
 
     def resolve_expr(self, expr: Expr) -> None:
-        expr.accept(self)
+        self._expr_dispatch[type(expr)](expr)
 
     def begin_scope(self) -> None:
-        self.scopes.append({})
+        self._scope_stack.append([])
 
     def end_scope(self) -> None:
-        self.scopes.pop()
+        bindings = self._bindings
+        for name in self._scope_stack.pop():
+            bindings[name].pop()
+
+    def bind(self, name: str) -> None:
+        # Slots are handed out in declaration order, matching the order the interpreter
+        # defines them. A redeclared name still gets a fresh slot, since it's defined again.
+        names = self._scope_stack[-1]
+        self._bindings[name].append(Binding(len(self._scope_stack) - 1, len(names), False))
+        names.append(name)
+
+    def innermost_binding(self, name: str) -> Optional[Binding]:
+        """The binding of name in the current scope, if it declared one."""
+        stack = self._bindings.get(name)
+        if stack and stack[-1].depth == len(self._scope_stack) - 1:
+            return stack[-1]
+        return None
 
     def declare(self, name: Token) -> None:
-        if not self.scopes:
+        if not self._scope_stack:
             return
 
-        scope = self.scopes[-1]
-        if name.lexeme in scope:
-            print(f"Error: Already a variable with name '{name.lexeme}' in this scope.")
+        if self.innermost_binding(name.lexeme) is not None:
+            self.error(f"Already a variable with name '{name.lexeme}' in this scope.")
 
-        scope[name.lexeme] = False
+        self.bind(name.lexeme)
 
     def define(self, name: Token) -> None:
-        if not self.scopes:
+        if not self._scope_stack:
             return
 
-        self.scopes[-1][name.lexeme] = True
+        self._bindings[name.lexeme][-1].defined = True
 
     def resolve_local(self, expr: Expr, name: Token) -> None:
-        for i in range(len(self.scopes) - 1, -1, -1):
-            if name.lexeme in self.scopes[i]:
-                self.interpreter.resolve(expr, len(self.scopes) - 1 - i)
-                return
+        stack = self._bindings.get(name.lexeme)
+        if stack:
+            binding = stack[-1]
+            self.interpreter.resolve(
+                expr, len(self._scope_stack) - 1 - binding.depth, binding.slot
+            )
 
     def resolve_function(
         self, function: Stmt.Function, function_type: FunctionType
@@ -74,6 +123,10 @@ class Resolver(ExprVisitor[None], StmtVisitor[None]):
         enclosing_function = self.current_function
         self.current_function = function_type
 
+        # Leaf until a nested function or class turns up and captures its environment
+        function.leaf = True
+        self.function_stack.append(function)
+
         self.begin_scope()
         for param in function.params:
             self.declare(param)
@@ -82,8 +135,14 @@ class Resolver(ExprVisitor[None], StmtVisitor[None]):
         self.resolve_statements(function.body)
         self.end_scope()
 
+        self.function_stack.pop()
         self.current_function = enclosing_function
 
+    def capture_enclosing_functions(self) -> None:
+        """A closure defined here keeps every enclosing function's environment alive."""
+        for function in self.function_stack:
+            function.leaf = False
+
     def visit_block_stmt(self, stmt: Stmt.Block) -> None:
         self.begin_scope()
         self.resolve_statements(stmt.statements)
@@ -92,6 +151,7 @@ class Resolver(ExprVisitor[None], StmtVisitor[None]):
     def visit_class_stmt(self, stmt: Stmt.Class) -> None:
         enclosing_class = self.current_class
         self.current_class = ClassType.CLASS
+        self.capture_enclosing_functions()
 
         self.declare(stmt.name)
         self.define(stmt.name)
@@ -100,18 +160,21 @@ class Resolver(ExprVisitor[None], StmtVisitor[None]):
             stmt.superclass is not None
             and stmt.name.lexeme == stmt.superclass.name.lexeme
         ):
-            print("Error: A class can't inherit from itself.")
+            self.error("A class can't inherit from itself.")
 
         if stmt.superclass is not None:
             self.current_class = ClassType.SUBCLASS
             self.resolve_expr(stmt.superclass)
 
+        enclosing_this_depth = self._this_depth
+        enclosing_super_depth = self._super_depth
+
         if stmt.superclass is not None:
             self.begin_scope()
-            self.scopes[-1]["super"] = True
+            self._super_depth = len(self._scope_stack) - 1
 
         self.begin_scope()
-        self.scopes[-1]["this"] = True
+        self._this_depth = len(self._scope_stack) - 1
 
         for method in stmt.methods:
             declaration = FunctionType.METHOD
@@ -124,12 +187,31 @@ class Resolver(ExprVisitor[None], StmtVisitor[None]):
         if stmt.superclass is not None:
             self.end_scope()
 
+        self._this_depth = enclosing_this_depth
+        self._super_depth = enclosing_super_depth
         self.current_class = enclosing_class
 
     def visit_expression_stmt(self, stmt: Stmt.Expression) -> None:
         self.resolve_expr(stmt.expression)
 
+    def visit_for_stmt(self, stmt: Stmt.For) -> None:
+        # A variable declared in the initializer gets a scope of its own, around the whole loop
+        loop_scope = type(stmt.initializer) is Stmt.Var
+        if loop_scope:
+            self.begin_scope()
+
+        if stmt.initializer is not None:
+            self.resolve_stmt(stmt.initializer)
+        self.resolve_expr(stmt.condition)
+        self.resolve_stmt(stmt.body)
+        if stmt.increment is not None:
+            self.resolve_expr(stmt.increment)
+
+        if loop_scope:
+            self.end_scope()
+
     def visit_function_stmt(self, stmt: Stmt.Function) -> None:
+        self.capture_enclosing_functions()
         self.declare(stmt.name)
         self.define(stmt.name)
 
@@ -146,11 +228,11 @@ class Resolver(ExprVisitor[None], StmtVisitor[None]):
 
     def visit_return_stmt(self, stmt: Stmt.Return) -> None:
         if self.current_function == FunctionType.NONE:
-            print("Error: Can't return from top-level code.")
+            self.error("Can't return from top-level code.")
 
         if stmt.value is not None:
             if self.current_function == FunctionType.INITIALIZER:
-                print("Error: Can't return a value from an initializer.")
+                self.error("Can't return a value from an initializer.")
 
             self.resolve_expr(stmt.value)
 
@@ -170,6 +252,7 @@ class Resolver(ExprVisitor[None], StmtVisitor[None]):
         self.resolve_local(expr, expr.name)
 
     def visit_binary_expr(self, expr: Expr.Binary) -> None:
+        self.interpreter.resolve_operator(expr)
         self.resolve_expr(expr.left)
         self.resolve_expr(expr.right)
 
@@ -198,30 +281,30 @@ class Resolver(ExprVisitor[None], StmtVisitor[None]):
 
     def visit_super_expr(self, expr: Expr.Super) -> None:
         if self.current_class == ClassType.NONE:
-            print("Error: Can't use 'super' outside of a class.")
+            self.error("Can't use 'super' outside of a class.")
         elif self.current_class != ClassType.SUBCLASS:
-            print("Error: Can't use 'super' in a class with no superclass.")
+            self.error("Can't use 'super' in a class with no superclass.")
 
-        self.resolve_local(expr, expr.keyword)
+        if self._super_depth is not None:
+            self.interpreter.resolve(
+                expr, len(self._scope_stack) - 1 - self._super_depth, 0
+            )
 
     def visit_this_expr(self, expr: Expr.This) -> None:
         if self.current_class == ClassType.NONE:
-            print("Error: Can't use 'this' outside of a class.")
+            self.error("Can't use 'this' outside of a class.")
             return
 
-        self.resolve_local(expr, expr.keyword)
+        self.interpreter.resolve(expr, len(self._scope_stack) - 1 - self._this_depth, 0)
 
     def visit_unary_expr(self, expr: Expr.Unary) -> None:
         self.resolve_expr(expr.right)
 
     def visit_variable_expr(self, expr: Expr.Variable) -> None:
-        if (
-            self.scopes
-            and expr.name.lexeme in self.scopes[-1]
-            and self.scopes[-1][expr.name.lexeme] is False
-        ):
-            print(
-                f"Error: Can't read local variable '{expr.name.lexeme}' in its own initializer."
+        binding = self.innermost_binding(expr.name.lexeme)
+        if binding is not None and binding.defined is False:
+            self.error(
+                f"Can't read local variable '{expr.name.lexeme}' in its own initializer."
             )
 
         self.resolve_local(expr, expr.name)
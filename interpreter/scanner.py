@@ -1,9 +1,52 @@
-from typing import List, Dict, Any
+import re
+import sys
+from typing import Any, Callable, Dict, Iterator, List, Optional, TextIO, Tuple
 from .token_type import Token, TokenType
 
+# First chars of number and identifier lexemes, for the _HANDLERS jump table
+_DIGITS = frozenset("0123456789")
+_ALPHA = frozenset("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ_")
+_WHITESPACE = re.compile(r"[ \r\t\n]+")
+# Spelled out rather than \d and \w, which would also match non-ASCII digits and letters
+_NUMBER = re.compile(r"[0-9]+(?:\.[0-9]+)?")
+_IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+# A comment goes until the end of the line. String literals are matched too, only so
+# that a // inside one isn't taken for a comment; an unterminated one runs to the end.
+_COMMENT = re.compile(r'"[^"]*"?|//[^\n]*')
+
+
+def _blank_comment(match: re.Match) -> str:
+    """Comments become spaces (never newlines), so line numbers don't shift."""
+    text = match.group()
+    return text if text[0] == '"' else " " * len(text)
+
+
+# Punctuation always has the same text, so its tokens reuse these instead of slicing
+_PUNCT_LEXEME: Dict[int, str] = {
+    TokenType.LEFT_PAREN: "(",
+    TokenType.RIGHT_PAREN: ")",
+    TokenType.LEFT_BRACE: "{",
+    TokenType.RIGHT_BRACE: "}",
+    TokenType.COMMA: ",",
+    TokenType.DOT: ".",
+    TokenType.MINUS: "-",
+    TokenType.PLUS: "+",
+    TokenType.SEMICOLON: ";",
+    TokenType.SLASH: "/",
+    TokenType.STAR: "*",
+    TokenType.BANG: "!",
+    TokenType.BANG_EQUAL: "!=",
+    TokenType.EQUAL: "=",
+    TokenType.EQUAL_EQUAL: "==",
+    TokenType.GREATER: ">",
+    TokenType.GREATER_EQUAL: ">=",
+    TokenType.LESS: "<",
+    TokenType.LESS_EQUAL: "<=",
+}
+
 
 class Scanner:
-    keywords: Dict[str, TokenType] = {
+    keywords: Dict[str, int] = {
         "and": TokenType.AND,
         "class": TokenType.CLASS,
         "else": TokenType.ELSE,
@@ -22,105 +65,58 @@ class Scanner:
         "while": TokenType.WHILE,
     }
 
-    def __init__(self, source: str):
+    def __init__(self, source: str, stdout: Optional[TextIO] = None):
+        if "//" in source:
+            source = _COMMENT.sub(_blank_comment, source)
         self.source = source
+        self.length = len(source)
         self.tokens: List[Token] = []
         self.start = 0  # First char in the lexeme
         self.current = 0  # Char we're currently looking at
         self.line = 1  # Line num
+        self.had_error = False
+        self.stdout = stdout  # Error sink; see Lox.stdout
 
     def scan_tokens(self) -> List[Token]:
-        while not self.is_at_end():
+        while self.current < self.length:
             self.start = self.current
             self.scan_token()
 
         self.tokens.append(Token(TokenType.EOF, "", None, self.line))
         return self.tokens
 
+    def stream_tokens(self) -> Iterator[Token]:
+        """Like scan_tokens(), but yields each token as soon as it's scanned."""
+        tokens = self.tokens
+        while self.current < self.length:
+            self.start = self.current
+            self.scan_token()
+            # scan_token() adds at most one token, so self.tokens never holds more than one
+            if tokens:
+                yield tokens.pop()
+
+        yield Token(TokenType.EOF, "", None, self.line)
+
     def is_at_end(self) -> bool:
-        return self.current >= len(self.source)
+        return self.current >= self.length
 
     def scan_token(self) -> None:
-        c = self.consume_and_advance()
-
-        # 1-char
-        if c == "(":
-            self.add_token(TokenType.LEFT_PAREN)
-        elif c == ")":
-            self.add_token(TokenType.RIGHT_PAREN)
-        elif c == "{":
-            self.add_token(TokenType.LEFT_BRACE)
-        elif c == "}":
-            self.add_token(TokenType.RIGHT_BRACE)
-
-        elif c == "-":
-            self.add_token(TokenType.MINUS)
-        elif c == "+":
-            self.add_token(TokenType.PLUS)
-        elif c == "*":
-            self.add_token(TokenType.STAR)
-
-        elif c == ",":
-            self.add_token(TokenType.COMMA)
-        elif c == ".":
-            self.add_token(TokenType.DOT)
-        elif c == ";":
-            self.add_token(TokenType.SEMICOLON)
-
-        # 2-chars
-        # We need to look ahead to the next char to see if the 2 chars together form a lexeme
-        elif c == "!":
-            self.add_token(
-                TokenType.BANG_EQUAL if self.consume_if_match("=") else TokenType.BANG
-            )
-        elif c == "=":
-            self.add_token(
-                TokenType.EQUAL_EQUAL if self.consume_if_match("=") else TokenType.EQUAL
-            )
-
-        elif c == "<":
-            self.add_token(
-                TokenType.LESS_EQUAL if self.consume_if_match("=") else TokenType.LESS
-            )
-        elif c == ">":
-            self.add_token(
-                TokenType.GREATER_EQUAL
-                if self.consume_if_match("=")
-                else TokenType.GREATER
-            )
-
-        elif c == "/":
-            if self.consume_if_match("/"):
-                # A comment goes until the end of the line
-                while self.peek() != "\n" and not self.is_at_end():
-                    self.consume_and_advance()
-            else:
-                self.add_token(TokenType.SLASH)
-
-        # Whitespace
-        elif c in [" ", "\r", "\t"]:
-            pass  # Ignore whitespace
-        elif c == "\n":
-            self.line += 1
-
-        # String literals
-        elif c == '"':
-            self.string_literal()
-
-        # Digits and identifiers (variables)
-        else:
-            if self.is_digit(c):
-                self.number_literal()
-            elif self.is_alpha(c):
-                self.identifier()
-            else:
-                print(f"Can't recognize char '{c}' on line {self.line}")
-
-    def consume_and_advance(self) -> str:
-        if self.is_at_end():
-            return "\0"
+        c = self.source[self.current]
         self.current += 1
-        return self.source[self.current - 1]
+
+        # One dict probe picks the handler, instead of walking an if/elif chain
+        handler = _HANDLERS.get(c)
+        if handler is None:
+            self.error(f"Can't recognize char '{c}' on line {self.line}")
+        else:
+            handler(self)
+
+    def whitespace(self) -> None:
+        # Ignore whitespace, skipping the whole run in one regex match
+        source = self.source
+        end = _WHITESPACE.match(source, self.start).end()
+        self.line += source.count("\n", self.start, end)
+        self.current = end
 
     def consume_if_match(self, expected: str) -> bool:
         if self.is_at_end():
@@ -130,68 +126,114 @@ class Scanner:
         self.current += 1
         return True
 
-    def peek(self) -> str:
-        if self.is_at_end():
-            return "\0"
-        return self.source[self.current]
-
-    def peek_at_next(self) -> str:
-        if self.current + 1 >= len(self.source):
-            return "\0"
-        return self.source[self.current + 1]
-
+    # The literal scanners below find where their lexeme ends with a single str.find()
+    # or regex match, rather than stepping through the source one character at a time
     def string_literal(self) -> None:
-        # Opening "
-        while self.peek() != '"' and not self.is_at_end():
-            if self.peek() == "\n":
-                self.line += 1
-            self.consume_and_advance()
+        source = self.source
 
-        if self.is_at_end():
-            print(f"Unterminated string at line {self.line}")
+        # Opening "
+        current = source.find('"', self.current)
+        if current < 0:
+            self.line += source.count("\n", self.current)
+            self.current = self.length
+            self.error(f"Unterminated string at line {self.line}")
             return
 
+        # Strings may span lines
+        self.line += source.count("\n", self.current, current)
+
         # Closing "
-        self.consume_and_advance()
+        self.current = current + 1
 
         # Trim off the enclosing "s to get the string only
-        value = self.source[self.start + 1 : self.current - 1]
+        value = source[self.start + 1 : current]
         self.add_token(TokenType.STRING, value)
 
     def number_literal(self) -> None:
-        while self.is_digit(self.peek()):
-            self.consume_and_advance()
-
-        # Deal with decimals
-        if self.peek() == "." and self.is_digit(self.peek_at_next()):
-            # Consume decimal
-            self.consume_and_advance()
-
-            # No more decimals expected after this; consume til end
-            while self.is_digit(self.peek()):
-                self.consume_and_advance()
-
-        value = float(self.source[self.start : self.current])
-        self.add_token(TokenType.NUMBER, value)
+        # One regex match runs the whole digit loop, decimal part included, in C
+        match = _NUMBER.match(self.source, self.start)
+        self.current = match.end()
+        text = match.group()
+        self.tokens.append(Token(TokenType.NUMBER, text, float(text), self.line))
 
     # Reserved keywords like `var`
     def identifier(self) -> None:
-        while self.is_alphanumeric(self.peek()):
-            self.consume_and_advance()
-
-        text = self.source[self.start : self.current]
-        token_type = self.keywords.get(text, TokenType.IDENTIFIER)
-        self.add_token(token_type)
-
-    def is_digit(self, c: str) -> bool:
-        return c >= "0" and c <= "9"
+        match = _IDENTIFIER.match(self.source, self.start)
+        self.current = match.end()
+
+        text = match.group()
+        keyword = _KEYWORD_TOKENS.get(text)
+        if keyword is None:
+            # Names are used as dict keys over and over; interned keys compare by identity
+            token_type = TokenType.IDENTIFIER
+            text = sys.intern(text)
+        else:
+            # Keywords share their canonical lexeme, so the slice is dropped right away
+            token_type, text = keyword
+        self.tokens.append(Token(token_type, text, None, self.line))
 
-    def is_alpha(self, c: str) -> bool:
-        return (c >= "a" and c <= "z") or (c >= "A" and c <= "Z") or c == "_"
+    def error(self, message: str) -> None:
+        print(message, file=self.stdout)
+        self.had_error = True
 
-    def is_alphanumeric(self, c: str) -> bool:
-        return self.is_alpha(c) or self.is_digit(c)
+    def add_punct(self, token_type: int) -> None:
+        self.tokens.append(Token(token_type, _PUNCT_LEXEME[token_type], None, self.line))
 
-    def add_token(self, token_type: TokenType, literal: Any = None) -> None:
+    def add_token(self, token_type: int, literal: Any = None) -> None:
         text = self.source[self.start : self.current]
         self.tokens.append(Token(token_type, text, literal, self.line))
+
+
+# Keyword text -> (token type, canonical lexeme)
+_KEYWORD_TOKENS: Dict[str, Tuple[int, str]] = {
+    text: (token_type, text) for text, token_type in Scanner.keywords.items()
+}
+
+
+def _single(token_type: int) -> Callable[[Scanner], None]:
+    lexeme = _PUNCT_LEXEME[token_type]
+
+    def handler(scanner: Scanner) -> None:
+        scanner.tokens.append(Token(token_type, lexeme, None, scanner.line))
+
+    return handler
+
+
+# We need to look ahead to the next char to see if the 2 chars together form a lexeme
+def _one_or_two(single: int, double: int) -> Callable[[Scanner], None]:
+    def handler(scanner: Scanner) -> None:
+        scanner.add_punct(double if scanner.consume_if_match("=") else single)
+
+    return handler
+
+
+# Jump table from the first char of a lexeme to the method that scans it
+_HANDLERS: Dict[str, Callable[[Scanner], None]] = {
+    # 1-char
+    "(": _single(TokenType.LEFT_PAREN),
+    ")": _single(TokenType.RIGHT_PAREN),
+    "{": _single(TokenType.LEFT_BRACE),
+    "}": _single(TokenType.RIGHT_BRACE),
+    "-": _single(TokenType.MINUS),
+    "+": _single(TokenType.PLUS),
+    "*": _single(TokenType.STAR),
+    ",": _single(TokenType.COMMA),
+    ".": _single(TokenType.DOT),
+    ";": _single(TokenType.SEMICOLON),
+    # 2-chars
+    "!": _one_or_two(TokenType.BANG, TokenType.BANG_EQUAL),
+    "=": _one_or_two(TokenType.EQUAL, TokenType.EQUAL_EQUAL),
+    "<": _one_or_two(TokenType.LESS, TokenType.LESS_EQUAL),
+    ">": _one_or_two(TokenType.GREATER, TokenType.GREATER_EQUAL),
+    "/": _single(TokenType.SLASH),
+    # Whitespace
+    " ": Scanner.whitespace,
+    "\r": Scanner.whitespace,
+    "\t": Scanner.whitespace,
+    "\n": Scanner.whitespace,
+    # String literals
+    '"': Scanner.string_literal,
+}
+# Digits and identifiers (variables)
+_HANDLERS.update(dict.fromkeys(_DIGITS, Scanner.number_literal))
+_HANDLERS.update(dict.fromkeys(_ALPHA, Scanner.identifier))
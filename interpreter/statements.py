@@ -1,4 +1,3 @@
-from abc import ABC, abstractmethod
 from typing import List, Generic, TypeVar, Optional
 from .token_type import Token
 from .expressions import Expr
@@ -6,51 +5,48 @@ from .expressions import Expr
 T = TypeVar("T")
 
 
-class StmtVisitor(ABC, Generic[T]):
-    @abstractmethod
+class StmtVisitor(Generic[T]):
     def visit_expression_stmt(self, stmt: "Expression") -> T:
-        pass
+        raise NotImplementedError
 
-    @abstractmethod
     def visit_print_stmt(self, stmt: "Print") -> T:
-        pass
+        raise NotImplementedError
 
-    @abstractmethod
     def visit_var_stmt(self, stmt: "Var") -> T:
-        pass
+        raise NotImplementedError
 
-    @abstractmethod
     def visit_block_stmt(self, stmt: "Block") -> T:
-        pass
+        raise NotImplementedError
 
-    @abstractmethod
     def visit_if_stmt(self, stmt: "If") -> T:
-        pass
+        raise NotImplementedError
 
-    @abstractmethod
     def visit_while_stmt(self, stmt: "While") -> T:
-        pass
+        raise NotImplementedError
+
+    def visit_for_stmt(self, stmt: "For") -> T:
+        raise NotImplementedError
 
-    @abstractmethod
     def visit_function_stmt(self, stmt: "Function") -> T:
-        pass
+        raise NotImplementedError
 
-    @abstractmethod
     def visit_return_stmt(self, stmt: "Return") -> T:
-        pass
+        raise NotImplementedError
 
-    @abstractmethod
     def visit_class_stmt(self, stmt: "Class") -> T:
-        pass
+        raise NotImplementedError
+
 
+class Stmt:
+    __slots__ = ()
 
-class Stmt(ABC):
-    @abstractmethod
     def accept(self, visitor: StmtVisitor[T]) -> T:
-        pass
+        raise NotImplementedError
 
 
 class Expression(Stmt):
+    __slots__ = ("expression",)
+
     def __init__(self, expression: Expr):
         self.expression = expression
 
@@ -59,6 +55,8 @@ class Expression(Stmt):
 
 
 class Print(Stmt):
+    __slots__ = ("expression",)
+
     def __init__(self, expression: Expr):
         self.expression = expression
 
@@ -67,6 +65,8 @@ class Print(Stmt):
 
 
 class Var(Stmt):
+    __slots__ = ("name", "initializer")
+
     def __init__(self, name: Token, initializer: Optional[Expr]):
         self.name = name
         self.initializer = initializer
@@ -76,6 +76,8 @@ class Var(Stmt):
 
 
 class Block(Stmt):
+    __slots__ = ("statements",)
+
     def __init__(self, statements: List[Stmt]):
         self.statements = statements
 
@@ -84,6 +86,8 @@ class Block(Stmt):
 
 
 class If(Stmt):
+    __slots__ = ("condition", "then_branch", "else_branch")
+
     def __init__(self, condition: Expr, then_branch: Stmt, else_branch: Optional[Stmt]):
         self.condition = condition
         self.then_branch = then_branch
@@ -94,6 +98,8 @@ class If(Stmt):
 
 
 class While(Stmt):
+    __slots__ = ("condition", "body")
+
     def __init__(self, condition: Expr, body: Stmt):
         self.condition = condition
         self.body = body
@@ -102,17 +108,44 @@ class While(Stmt):
         return visitor.visit_while_stmt(self)
 
 
+class For(Stmt):
+    """A for loop, kept whole rather than desugared into While inside Blocks."""
+
+    __slots__ = ("initializer", "condition", "increment", "body")
+
+    def __init__(
+        self,
+        initializer: Optional[Stmt],
+        condition: Expr,
+        increment: Optional[Expr],
+        body: Stmt,
+    ):
+        self.initializer = initializer
+        self.condition = condition
+        self.increment = increment
+        self.body = body
+
+    def accept(self, visitor: StmtVisitor[T]) -> T:
+        return visitor.visit_for_stmt(self)
+
+
 class Function(Stmt):
+    __slots__ = ("name", "params", "body", "leaf")
+
     def __init__(self, name: Token, params: List[Token], body: List[Stmt]):
         self.name = name
         self.params = params
         self.body = body
+        # Set by the Resolver: True if no closure can capture this function's call environment
+        self.leaf = False
 
     def accept(self, visitor: StmtVisitor[T]) -> T:
         return visitor.visit_function_stmt(self)
 
 
 class Return(Stmt):
+    __slots__ = ("keyword", "value")
+
     def __init__(self, keyword: Token, value: Optional[Expr]):
         self.keyword = keyword
         self.value = value
@@ -122,6 +155,8 @@ class Return(Stmt):
 
 
 class Class(Stmt):
+    __slots__ = ("name", "superclass", "methods")
+
     def __init__(
         self, name: Token, superclass: Optional[Expr], methods: List[Function]
     ):
@@ -139,6 +174,21 @@ Stmt.Var = Var
 Stmt.Block = Block
 Stmt.If = If
 Stmt.While = While
+Stmt.For = For
 Stmt.Function = Function
 Stmt.Return = Return
 Stmt.Class = Class
+
+# Node class -> name of the StmtVisitor method that handles it, for build_dispatch()
+STMT_VISIT_METHODS = {
+    Block: "visit_block_stmt",
+    Class: "visit_class_stmt",
+    Expression: "visit_expression_stmt",
+    For: "visit_for_stmt",
+    Function: "visit_function_stmt",
+    If: "visit_if_stmt",
+    Print: "visit_print_stmt",
+    Return: "visit_return_stmt",
+    Var: "visit_var_stmt",
+    While: "visit_while_stmt",
+}
@@ -108,6 +108,37 @@ def test_control_flow():
     assert result == "0\n1\n2", f"Expected '0\\n1\\n2', got '{result}'"
     print("✓ For loop")
 
+    # Closures in the body all share the one loop variable, but capture
+    # a fresh copy declared in the body on each iteration
+    code = """
+        var shared;
+        var copied;
+        for (var i = 0; i < 3; i = i + 1) {
+            var j = i;
+            fun f() { print i; }
+            fun g() { print j; }
+            if (i == 1) {
+                shared = f;
+                copied = g;
+            }
+        }
+        shared();
+        copied();
+    """
+    result = run_lox_code(code)
+    assert result == "3\n1", f"Expected '3\\n1', got '{result}'"
+    print("✓ For loop closures")
+
+    # Without an initializer the loop assigns to the outer variable
+    code = """
+        var i = 10;
+        for (; i < 12;) i = i + 1;
+        print i;
+    """
+    result = run_lox_code(code)
+    assert result == "12", f"Expected '12', got '{result}'"
+    print("✓ For loop without initializer")
+
 
 def test_functions():
     """Test function declarations and calls."""
@@ -157,6 +188,97 @@ def test_functions():
     print("✓ Closures")
 
 
+def test_call_environments():
+    """Test that reused call environments never leak between calls."""
+    print("Testing Call Environments...")
+
+    # Recursion: each nested call needs its own environment, with locals intact after it returns
+    code = """
+        fun sum(n) {
+            if (n == 0) return 0;
+            var here = n;
+            var rest = sum(n - 1);
+            return here + rest;
+        }
+
+        print sum(10);
+        print sum(3);
+    """
+    result = run_lox_code(code)
+    assert result == "55\n6", f"Expected '55\\n6', got '{result}'"
+    print("✓ Recursion through a leaf function")
+
+    # A closure declared in a nested block keeps the function's environment alive
+    code = """
+        fun make(value) {
+            {
+                fun get() {
+                    return value;
+                }
+                return get;
+            }
+        }
+
+        var a = make("a");
+        var b = make("b");
+        print a();
+        print b();
+    """
+    result = run_lox_code(code)
+    assert result == "a\nb", f"Expected 'a\\nb', got '{result}'"
+    print("✓ Closure declared in a nested block")
+
+    # A local class's methods capture the function's environment too
+    code = """
+        fun makeClass(value) {
+            class Box {
+                get() {
+                    return value;
+                }
+            }
+            return Box;
+        }
+
+        var A = makeClass("a");
+        var B = makeClass("b");
+        print A().get();
+        print B().get();
+    """
+    result = run_lox_code(code)
+    assert result == "a\nb", f"Expected 'a\\nb', got '{result}'"
+    print("✓ Local class declared inside a function")
+
+    # Function values that escape and get called later, between other calls
+    code = """
+        fun add(a, b) {
+            return a + b;
+        }
+
+        fun counter() {
+            var i = 0;
+            fun inc() {
+                i = i + 1;
+                return i;
+            }
+            return inc;
+        }
+
+        var plus = add;
+        var c1 = counter();
+        var c2 = counter();
+        print plus(1, 2);
+        c1();
+        print add(3, 4);
+        c1();
+        print c1();
+        print c2();
+        print plus(5, 6);
+    """
+    result = run_lox_code(code)
+    assert result == "3\n7\n3\n1\n11", f"Expected '3\\n7\\n3\\n1\\n11', got '{result}'"
+    print("✓ Escaping function values called later")
+
+
 def test_classes():
     """Test class declarations and instances."""
     print("Testing Classes...")
@@ -224,6 +346,134 @@ def test_inheritance():
     print("✓ Class inheritance and super calls")
 
 
+def test_return():
+    """Test return statements unwinding blocks and loops."""
+    print("Testing Return...")
+
+    code = """
+        fun find(limit) {
+            var i = 0;
+            while (true) {
+                {
+                    i = i + 1;
+                    if (i > limit) return i;
+                }
+            }
+            print "unreachable";
+        }
+        print find(3);
+        print "after";
+    """
+    result = run_lox_code(code)
+    assert result == "4\nafter", f"Expected '4\\nafter', got '{result}'"
+    print("✓ Return from inside nested loops and blocks")
+
+    # The Resolver reports it, so the program never runs
+    code = """
+        print 1;
+        return;
+        print 2;
+    """
+    expected = "Error: Can't return from top-level code."
+    result = run_lox_code(code)
+    assert result == expected, f"Expected '{expected}', got '{result}'"
+    print("✓ Top-level return is reported")
+
+    # Interpreted without resolving, the program stops at the return
+    lox = Lox()
+    lox.stdout = StringIO()
+    lox.interpreter.interpret(lox.parse(code))
+    result = lox.stdout.getvalue().strip()
+    assert result == "1", f"Expected '1', got '{result}'"
+    print("✓ Top-level return stops the interpreter")
+
+
+def test_parse_cache():
+    """Test reusing parsed statements across runs."""
+    print("Testing Parse Cache...")
+
+    lox = Lox()
+    lox.CACHE_SIZE = 2
+    first = lox.parse("print 1;")
+    lox.parse("print 2;")
+    # Using "print 1;" again makes "print 2;" the least recently used
+    assert lox.parse("print 1;") is first, "Expected the cached statements"
+    lox.parse("print 3;")
+    assert lox.parse("print 1;") is first, "Expected the recently used entry to be kept"
+    assert len(lox._cache) == 2, f"Expected 2 cached sources, got {len(lox._cache)}"
+    print("✓ Least recently used source is evicted")
+
+    # Statements with errors aren't cached, so every run reports them again
+    lox = Lox()
+    lox.stdout = StringIO()
+    lox.parse("print ;")
+    lox.parse("print ;")
+    assert len(lox._cache) == 0, f"Expected nothing cached, got {len(lox._cache)}"
+    errors = lox.stdout.getvalue().count("Expected expression")
+    assert errors == 2, f"Expected 2 error messages, got {errors}"
+    print("✓ Sources with errors are not cached")
+
+
+def test_cached_runs():
+    """Test running the same parsed statements more than once."""
+    print("Testing Cached Runs...")
+
+    code = """
+        fun double(n) {
+            var x = n * 2;
+            return x;
+        }
+        var a = double(2);
+        {
+            var b = a + 1;
+            print b;
+        }
+    """
+    lox = Lox()
+    lox.stdout = StringIO()
+    lox.run(code)
+    lox.reset()
+    lox.run(code)
+    # Visualizing and running share one parse
+    statements = lox.parse(code)
+    lox.reset()
+    lox.run_parsed(statements)
+    result = lox.stdout.getvalue().strip()
+    assert result == "5\n5\n5", f"Expected '5\\n5\\n5', got '{result}'"
+    print("✓ Cached statements resolve and run again")
+
+    # The Resolver runs every time, so its errors are reported on every run,
+    # and a program that fails resolution never runs
+    code = """
+        print "start";
+        {
+            var a = 1;
+            var a = 2;
+        }
+    """
+    lox = Lox()
+    lox.stdout = StringIO()
+    lox.run(code)
+    assert lox.had_error, "Expected had_error after a resolution error"
+    lox.reset()
+    lox.run(code)
+    output = lox.stdout.getvalue()
+    errors = output.count("Already a variable with name 'a'")
+    assert errors == 2, f"Expected 2 error messages, got {errors}"
+    assert "start" not in output, f"Expected no program output, got {output!r}"
+    print("✓ Resolution errors are reported on every run")
+
+    # Scan and parse errors also stop the run
+    for code in ('print 1; #', 'print 1; print ;'):
+        lox = Lox()
+        lox.stdout = StringIO()
+        lox.run(code)
+        output = lox.stdout.getvalue()
+        assert lox.had_error, f"Expected had_error for {code!r}"
+        assert "1" not in output.splitlines(), f"Expected no program output, got {output!r}"
+    print("✓ Scan and parse errors stop the run")
+
+
 def test_built_ins():
     """Test built-in functions."""
     print("Testing Built-ins...")
@@ -236,6 +486,41 @@ def test_built_ins():
     print("✓ Built-in clock function")
 
 
+def test_equality():
+    """Test equality, including NaN."""
+    print("Testing Equality...")
+
+    # Overflow to inf, then inf - inf is NaN, which never equals itself
+    code = """
+        var x = 1;
+        for (var i = 0; i < 400; i = i + 1) x = x * 10;
+        var n = x - x;
+        print n == n;
+        print n != n;
+        print x == x;
+    """
+    result = run_lox_code(code)
+    assert result == "false\ntrue\ntrue", f"Expected 'false\\ntrue\\ntrue', got '{result}'"
+    print("✓ NaN is not equal to itself")
+
+    # Accessing a method on an instance yields the same bound method every time,
+    # while another instance of the class gets a bound method of its own
+    code = """
+        class A {
+            m() {}
+        }
+        var a = A();
+        print a.m == a.m;
+        var m = a.m;
+        print m == m;
+        print a.m == A().m;
+        print a.m != a.m;
+    """
+    result = run_lox_code(code)
+    assert result == "true\ntrue\nfalse\nfalse", f"Expected 'true\\ntrue\\nfalse\\nfalse', got '{result}'"
+    print("✓ Bound method equality")
+
+
 def main():
     """Run all tests."""
 
@@ -248,12 +533,22 @@ def main():
         print()
         test_functions()
         print()
+        test_call_environments()
+        print()
         test_classes()
         print()
         test_inheritance()
         print()
+        test_return()
+        print()
+        test_parse_cache()
+        print()
+        test_cached_runs()
+        print()
         test_built_ins()
         print()
+        test_equality()
+        print()
         print("🎉 All comprehensive tests passed!")
 
     except Exception as e:
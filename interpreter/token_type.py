@@ -1,69 +1,82 @@
-from enum import Enum, auto
-from typing import Any
+from typing import Any, Dict
 
 
-# auto() gives unique int values for each enum
-class TokenType(Enum):
+# Token types are plain int class attributes rather than an Enum: the scanner and
+# parser read and compare them constantly, and a plain attribute load plus int
+# comparison skips the Enum member lookup. Every token stores the very same int
+# object held here, so identity checks against TokenType.X stay valid.
+class TokenType:
     # Keywords
-    AND = auto()
-    CLASS = auto()
-    ELSE = auto()
-    FALSE = auto()
-    FUN = auto()
-    FOR = auto()
-    IF = auto()
-    NIL = auto()
-    OR = auto()
-    PRINT = auto()
-    RETURN = auto()
-    SUPER = auto()
-    THIS = auto()
-    TRUE = auto()
-    VAR = auto()
-    WHILE = auto()
+    AND = 1
+    CLASS = 2
+    ELSE = 3
+    FALSE = 4
+    FUN = 5
+    FOR = 6
+    IF = 7
+    NIL = 8
+    OR = 9
+    PRINT = 10
+    RETURN = 11
+    SUPER = 12
+    THIS = 13
+    TRUE = 14
+    VAR = 15
+    WHILE = 16
 
     # 1-char tokens
-    LEFT_PAREN = auto()
-    RIGHT_PAREN = auto()
-    LEFT_BRACE = auto()
-    RIGHT_BRACE = auto()
-    COMMA = auto()
-    DOT = auto()
-    MINUS = auto()
-    PLUS = auto()
-    SEMICOLON = auto()
-    SLASH = auto()
-    STAR = auto()
+    LEFT_PAREN = 17
+    RIGHT_PAREN = 18
+    LEFT_BRACE = 19
+    RIGHT_BRACE = 20
+    COMMA = 21
+    DOT = 22
+    MINUS = 23
+    PLUS = 24
+    SEMICOLON = 25
+    SLASH = 26
+    STAR = 27
 
     # 1, possibly 2-char tokens
-    BANG = auto()
-    BANG_EQUAL = auto()
-    EQUAL = auto()
-    EQUAL_EQUAL = auto()
-    GREATER = auto()
-    GREATER_EQUAL = auto()
-    LESS = auto()
-    LESS_EQUAL = auto()
+    BANG = 28
+    BANG_EQUAL = 29
+    EQUAL = 30
+    EQUAL_EQUAL = 31
+    GREATER = 32
+    GREATER_EQUAL = 33
+    LESS = 34
+    LESS_EQUAL = 35
 
-    IDENTIFIER = auto()
-    STRING = auto()
-    NUMBER = auto()
+    IDENTIFIER = 36
+    STRING = 37
+    NUMBER = 38
 
-    EOF = auto()
+    EOF = 39
+
+
+# Reverse map for printing, e.g. TOKEN_NAMES[TokenType.PLUS] == "PLUS"
+TOKEN_NAMES: Dict[int, str] = {
+    value: name for name, value in vars(TokenType).items() if not name.startswith("_")
+}
 
 
 class Token:
-    def __init__(self, token_type: TokenType, lexeme: str, literal: Any, line: int):
+    # Scanners produce one Token per lexeme, so skip the per-instance __dict__
+    __slots__ = ("type", "lexeme", "literal", "line")
+
+    def __init__(self, token_type: int, lexeme: str, literal: Any, line: int):
         self.type = token_type  # The category of token
-        self.lexeme = lexeme  # The char sequence from the source code
+        # The char sequence from the source code. Identifier lexemes arrive interned from the
+        # scanner, so name lookups in environments and field/method tables match by identity.
+        self.lexeme = lexeme
         self.literal = (
             literal  # Char sequence converted to a Python number (float) or string
         )
         self.line = line  # Line num
 
     def __str__(self) -> str:
-        return f"{self.type} {self.lexeme} {self.literal}"
+        return f"TokenType.{TOKEN_NAMES[self.type]} {self.lexeme} {self.literal}"
 
     def __repr__(self) -> str:
         # `!r` calls repr(), so we can see escape sequences
-        return f"Token({self.type}, {self.lexeme!r}, {self.literal!r}, {self.line})"
+        return f"Token(TokenType.{TOKEN_NAMES[self.type]}, {self.lexeme!r}, {self.literal!r}, {self.line})"
@@ -1,10 +1,82 @@
-from typing import Any, List, Optional
-from interpreter.expressions import ExprVisitor
-from interpreter.statements import Stmt, StmtVisitor
-from interpreter.token_type import Token
-
-
-class ASTVisualizer(ExprVisitor[str], StmtVisitor[str]):
+from typing import Any, List, Tuple
+from interpreter.expressions import EXPR_VISIT_METHODS, ExprVisitor, build_dispatch
+from interpreter.statements import STMT_VISIT_METHODS, Stmt, StmtVisitor
+from interpreter.token_type import TOKEN_NAMES, Token
+
+
+# Tailwind classes for node type labels; any type not listed gets _DEFAULT_TYPE_CLASS
+_TYPE_CLASSES = {
+    "Literal": "text-purple-700 bg-purple-100",
+    "Variable": "text-green-700 bg-green-100",
+    "BinaryExpr": "text-orange-700 bg-orange-100",
+    "LogicalExpr": "text-orange-700 bg-orange-100",
+    "FunctionStmt": "text-pink-700 bg-pink-100",
+}
+_DEFAULT_TYPE_CLASS = "text-blue-700 bg-blue-100"
+
+
+def _label(node_type: str) -> Tuple[str, str]:
+    return node_type, _TYPE_CLASSES.get(node_type, _DEFAULT_TYPE_CLASS)
+
+
+# (node type label, Tailwind classes) pairs passed straight to _open_node/_leaf
+_EXPRESSION_STMT = _label("ExpressionStmt")
+_PRINT_STMT = _label("PrintStmt")
+_VAR_STMT = _label("VarStmt")
+_BLOCK_STMT = _label("BlockStmt")
+_IF_STMT = _label("IfStmt")
+_WHILE_STMT = _label("WhileStmt")
+_FOR_STMT = _label("ForStmt")
+_FUNCTION_STMT = _label("FunctionStmt")
+_RETURN_STMT = _label("ReturnStmt")
+_CLASS_STMT = _label("ClassStmt")
+_BINARY_EXPR = _label("BinaryExpr")
+_GROUPING_EXPR = _label("GroupingExpr")
+_LITERAL = _label("Literal")
+_UNARY_EXPR = _label("UnaryExpr")
+_VARIABLE = _label("Variable")
+_ASSIGN_EXPR = _label("AssignExpr")
+_LOGICAL_EXPR = _label("LogicalExpr")
+_CALL_EXPR = _label("CallExpr")
+_GET_EXPR = _label("GetExpr")
+_SET_EXPR = _label("SetExpr")
+_THIS = _label("This")
+_SUPER = _label("Super")
+
+# Static HTML fragments used to write nodes; only the type classes, label,
+# content and children are filled in per node.
+_BASE = "m-0.5 p-1 px-2 rounded bg-white"
+_NODE_OPEN = (
+    f'<details class="{_BASE}" open>'
+    '<summary class="cursor-pointer py-1 select-none flex items-center gap-2 hover:bg-gray-50 rounded">'
+    '<span class="font-bold '
+)
+_LEAF_OPEN = f'<div class="{_BASE}"><span class="font-bold '
+_LABEL_MID = ' px-1.5 py-0.5 rounded text-xs">'
+_LABEL_CLOSE = "</span>"
+_CONTENT_OPEN = ' <span class="text-green-600 font-medium text-xs">'
+_CONTENT_CLOSE = "</span>"
+_CHILDREN_OPEN = '</summary><div class="ml-4 pl-3 border-l-2 border-gray-200 mt-1">'
+_NODE_CLOSE = "</div></details>"
+_LEAF_CLOSE = "</div>"
+
+# Gray section labels between a node's children, e.g. an if's condition and branches
+_SECTION_LABEL = '<div class="text-xs text-gray-500 font-semibold my-1 mt-2 tracking-wide">{}:</div>'
+_LABEL_CONDITION = _SECTION_LABEL.format("condition")
+_LABEL_THEN = _SECTION_LABEL.format("then")
+_LABEL_ELSE = _SECTION_LABEL.format("else")
+_LABEL_BODY = _SECTION_LABEL.format("body")
+_LABEL_INITIALIZER = _SECTION_LABEL.format("initializer")
+_LABEL_INCREMENT = _SECTION_LABEL.format("increment")
+_LABEL_FUNCTION = _SECTION_LABEL.format("function")
+_LABEL_ARGUMENTS = _SECTION_LABEL.format("arguments")
+
+# Placeholders written in place of nodes past the node or depth limit
+_TRUNC_COUNT_HTML = '<div class="text-red-600 italic bg-red-50 p-2 rounded border border-dashed border-red-300 m-1">... (node limit reached)</div>'
+_TRUNC_DEPTH_HTML = '<div class="text-red-600 italic bg-red-50 p-2 rounded border border-dashed border-red-300 m-1">... (max depth {} reached)</div>'
+
+
+class ASTVisualizer(ExprVisitor[None], StmtVisitor[None]):
     """Generates HTML tree representation of AST nodes"""
 
     def __init__(self, max_depth: int = 15, max_nodes: int = 100):
@@ -12,99 +84,85 @@ class ASTVisualizer(ExprVisitor[str], StmtVisitor[str]):
         self.max_nodes = max_nodes
         self.node_count = 0
         self.current_depth = 0
-
-    def visualize_statements(self, statements: List[Optional[Stmt]]) -> str:
+        # Set once the node limit is hit; every visit after that returns without writing
+        self._truncated = False
+        self._trunc_depth_html = _TRUNC_DEPTH_HTML.format(max_depth)
+        # Every visit appends its HTML here; joined once at the end of visualize_statements
+        self._out: List[str] = []
+        self._dispatch = build_dispatch(self, {**EXPR_VISIT_METHODS, **STMT_VISIT_METHODS})
+
+    def _visit(self, node) -> None:
+        if self._truncated:
+            return
+
+        # Past either limit, write a placeholder in the node's place and skip its subtree.
+        # The node limit cuts off the rest of the tree, so it gets a single placeholder.
+        self.node_count += 1
+        if self.node_count > self.max_nodes:
+            self._truncated = True
+            self._out.append(_TRUNC_COUNT_HTML)
+            return
+        depth = self.current_depth
+        if depth > self.max_depth:
+            self._out.append(self._trunc_depth_html)
+            return
+
+        # Children of this node are visited one level deeper
+        self.current_depth = depth + 1
+        self._dispatch[type(node)](node)
+        self.current_depth = depth
+
+    def visualize_statements(self, statements: List[Stmt]) -> str:
         if not statements:
             return '<div class="text-gray-500 italic text-center p-5">No statements to visualize</div>'
 
         self.node_count = 0
         self.current_depth = 0
+        self._truncated = False
 
-        html_parts = ['<div class="m-0">']
+        self._out = out = ['<div class="m-0">']
+        append = out.append
+        visit = self._visit
+        last = len(statements) - 1
 
         for i, stmt in enumerate(statements):
-            if stmt is None:
-                continue
-
             if self.node_count >= self.max_nodes:
-                html_parts.append(
+                append(
                     f'<div class="text-red-600 italic bg-red-50 p-2 rounded border border-dashed border-red-300 m-1">... (truncated - AST has {self.node_count}+ nodes, showing first {self.max_nodes})</div>'
                 )
                 break
 
-            html_parts.append(f'<div class="mb-3 last:mb-0" data-index="{i}">')
-            html_parts.append(stmt.accept(self))
-            html_parts.append("</div>")
+            append(f'<div class="mb-3 last:mb-0" data-index="{i}">')
+            visit(stmt)
+            append("</div>")
 
             # Add separator between statements (but not after the last one)
-            if i < len(statements) - 1 and statements[i + 1] is not None:
-                html_parts.append('<div class="border-t border-gray-100 my-2"></div>')
-
-        html_parts.append("</div>")
-        return "".join(html_parts)
-
-    def _get_node_type_classes(self, node_type: str) -> str:
-        """Tailwind classes"""
-        type_classes = {
-            "Literal": "text-purple-700 bg-purple-100",
-            "Variable": "text-green-700 bg-green-100",
-            "BinaryExpr": "text-orange-700 bg-orange-100",
-            "LogicalExpr": "text-orange-700 bg-orange-100",
-            "FunctionStmt": "text-pink-700 bg-pink-100",
-            "ClassStmt": "text-blue-700 bg-blue-100",
-            "PrintStmt": "text-blue-700 bg-blue-100",
-            "VarStmt": "text-blue-700 bg-blue-100",
-            "BlockStmt": "text-blue-700 bg-blue-100",
-            "IfStmt": "text-blue-700 bg-blue-100",
-            "WhileStmt": "text-blue-700 bg-blue-100",
-            "ReturnStmt": "text-blue-700 bg-blue-100",
-            "ExpressionStmt": "text-blue-700 bg-blue-100",
-            "AssignExpr": "text-blue-700 bg-blue-100",
-            "UnaryExpr": "text-blue-700 bg-blue-100",
-            "GroupingExpr": "text-blue-700 bg-blue-100",
-            "CallExpr": "text-blue-700 bg-blue-100",
-            "GetExpr": "text-blue-700 bg-blue-100",
-            "SetExpr": "text-blue-700 bg-blue-100",
-            "This": "text-blue-700 bg-blue-100",
-            "Super": "text-blue-700 bg-blue-100",
-        }
-        return type_classes.get(node_type, "text-blue-700 bg-blue-100")
-
-    def _create_node(
-        self, node_type: str, content: str = "", children: List[str] = None
-    ) -> str:
-        self.node_count += 1
-
-        if self.node_count > self.max_nodes:
-            return '<div class="text-red-600 italic bg-red-50 p-2 rounded border border-dashed border-red-300 m-1">... (node limit reached)</div>'
-
-        if self.current_depth > self.max_depth:
-            return f'<div class="text-red-600 italic bg-red-50 p-2 rounded border border-dashed border-red-300 m-1">... (max depth {self.max_depth} reached)</div>'
-
-        # Base node classes
-        base_classes = "m-0.5 p-1 px-2 rounded bg-white"
-        type_classes = self._get_node_type_classes(node_type)
-
-        if children:
-            children_html = "".join(children)
-            return f'''
-            <details class="{base_classes}" open>
-                <summary class="cursor-pointer py-1 select-none flex items-center gap-2 hover:bg-gray-50 rounded">
-                    <span class="font-bold {type_classes} px-1.5 py-0.5 rounded text-xs">{node_type}</span>
-                    {f'<span class="text-green-600 font-medium text-xs">{content}</span>' if content else ""}
-                </summary>
-                <div class="ml-4 pl-3 border-l-2 border-gray-200 mt-1">
-                    {children_html}
-                </div>
-            </details>
-            '''
-        else:
-            return f'''
-            <div class="{base_classes}">
-                <span class="font-bold {type_classes} px-1.5 py-0.5 rounded text-xs">{node_type}</span>
-                {f'<span class="text-green-600 font-medium text-xs">{content}</span>' if content else ""}
-            </div>
-            '''
+            if i < last:
+                append('<div class="border-t border-gray-100 my-2"></div>')
+
+        out.append("</div>")
+        self._out = []
+        return "".join(out)
+
+    def _open_node(self, label: Tuple[str, str], content: str = "") -> None:
+        """Write the opening of a node with children; _close_node() ends it."""
+        node_type, type_classes = label
+        out = self._out
+        out += (_NODE_OPEN, type_classes, _LABEL_MID, node_type, _LABEL_CLOSE)
+        if content:
+            out += (_CONTENT_OPEN, content, _CONTENT_CLOSE)
+        out.append(_CHILDREN_OPEN)
+
+    def _close_node(self) -> None:
+        self._out.append(_NODE_CLOSE)
+
+    def _leaf(self, label: Tuple[str, str], content: str = "") -> None:
+        node_type, type_classes = label
+        out = self._out
+        out += (_LEAF_OPEN, type_classes, _LABEL_MID, node_type, _LABEL_CLOSE)
+        if content:
+            out += (_CONTENT_OPEN, content, _CONTENT_CLOSE)
+        out.append(_LEAF_CLOSE)
 
     def _format_token(self, token: Token) -> str:
         if token.lexeme != str(token.literal) and token.literal is not None:
@@ -112,7 +170,7 @@ class ASTVisualizer(ExprVisitor[str], StmtVisitor[str]):
         elif token.lexeme:
             return f'"{token.lexeme}"'
         else:
-            return str(token.token_type).split(".")[-1]
+            return TOKEN_NAMES[token.type]
 
     def _format_value(self, value: Any) -> str:
         if value is None:
@@ -125,233 +183,221 @@ class ASTVisualizer(ExprVisitor[str], StmtVisitor[str]):
             return str(value)
 
     # Statement visitors
-    def visit_expression_stmt(self, stmt) -> str:
-        self.current_depth += 1
-        child = stmt.expression.accept(self)
-        self.current_depth -= 1
-        return self._create_node("ExpressionStmt", children=[child])
-
-    def visit_print_stmt(self, stmt) -> str:
-        self.current_depth += 1
-        child = stmt.expression.accept(self)
-        self.current_depth -= 1
-        return self._create_node("PrintStmt", children=[child])
-
-    def visit_var_stmt(self, stmt) -> str:
-        content = self._format_token(stmt.name)
-        children = []
+    def visit_expression_stmt(self, stmt) -> None:
+        self._open_node(_EXPRESSION_STMT)
+        self._visit(stmt.expression)
+        self._close_node()
 
-        if stmt.initializer:
-            self.current_depth += 1
-            children.append(stmt.initializer.accept(self))
-            self.current_depth -= 1
+    def visit_print_stmt(self, stmt) -> None:
+        self._open_node(_PRINT_STMT)
+        self._visit(stmt.expression)
+        self._close_node()
 
-        return self._create_node("VarStmt", content, children if children else None)
+    def visit_var_stmt(self, stmt) -> None:
+        content = self._format_token(stmt.name)
 
-    def visit_block_stmt(self, stmt) -> str:
-        children = []
-        self.current_depth += 1
+        if not stmt.initializer:
+            self._leaf(_VAR_STMT, content)
+        else:
+            self._open_node(_VAR_STMT, content)
+            self._visit(stmt.initializer)
+            self._close_node()
 
-        for statement in stmt.statements:
-            if statement:
-                children.append(statement.accept(self))
+    def visit_block_stmt(self, stmt) -> None:
+        if not stmt.statements:
+            self._leaf(_BLOCK_STMT)
+        else:
+            self._open_node(_BLOCK_STMT)
+            visit = self._visit
+
+            for statement in stmt.statements:
+                visit(statement)
 
-        self.current_depth -= 1
-        return self._create_node("BlockStmt", children=children)
+            self._close_node()
 
-    def visit_if_stmt(self, stmt) -> str:
-        children = []
-        self.current_depth += 1
+    def visit_if_stmt(self, stmt) -> None:
+        self._open_node(_IF_STMT)
+        out = self._out
 
         # Condition
-        children.append(
-            '<div class="text-xs text-gray-500 font-semibold my-1 mt-2 tracking-wide">condition:</div>'
-        )
-        children.append(stmt.condition.accept(self))
+        out.append(_LABEL_CONDITION)
+        self._visit(stmt.condition)
 
         # Then branch
-        children.append(
-            '<div class="text-xs text-gray-500 font-semibold my-1 mt-2 tracking-wide">then:</div>'
-        )
-        children.append(stmt.then_branch.accept(self))
+        out.append(_LABEL_THEN)
+        self._visit(stmt.then_branch)
 
         # Else branch
         if stmt.else_branch:
-            children.append(
-                '<div class="text-xs text-gray-500 font-semibold my-1 mt-2 tracking-wide">else:</div>'
-            )
-            children.append(stmt.else_branch.accept(self))
+            out.append(_LABEL_ELSE)
+            self._visit(stmt.else_branch)
 
-        self.current_depth -= 1
-        return self._create_node("IfStmt", children=children)
+        self._close_node()
 
-    def visit_while_stmt(self, stmt) -> str:
-        children = []
-        self.current_depth += 1
+    def visit_while_stmt(self, stmt) -> None:
+        self._open_node(_WHILE_STMT)
+        out = self._out
 
-        children.append(
-            '<div class="text-xs text-gray-500 font-semibold my-1 mt-2 tracking-wide">condition:</div>'
-        )
-        children.append(stmt.condition.accept(self))
-        children.append(
-            '<div class="text-xs text-gray-500 font-semibold my-1 mt-2 tracking-wide">body:</div>'
-        )
-        children.append(stmt.body.accept(self))
+        out.append(_LABEL_CONDITION)
+        self._visit(stmt.condition)
+        out.append(_LABEL_BODY)
+        self._visit(stmt.body)
+
+        self._close_node()
 
-        self.current_depth -= 1
-        return self._create_node("WhileStmt", children=children)
+    def visit_for_stmt(self, stmt) -> None:
+        self._open_node(_FOR_STMT)
+        out = self._out
 
-    def visit_function_stmt(self, stmt) -> str:
+        if stmt.initializer:
+            out.append(_LABEL_INITIALIZER)
+            self._visit(stmt.initializer)
+        out.append(_LABEL_CONDITION)
+        self._visit(stmt.condition)
+        if stmt.increment:
+            out.append(_LABEL_INCREMENT)
+            self._visit(stmt.increment)
+        out.append(_LABEL_BODY)
+        self._visit(stmt.body)
+
+        self._close_node()
+
+    def visit_function_stmt(self, stmt) -> None:
         content = self._format_token(stmt.name)
         if stmt.params:
             params = ", ".join(self._format_token(p) for p in stmt.params)
             content += f" ({params})"
 
-        children = []
-        self.current_depth += 1
-
-        for statement in stmt.body:
-            if statement:
-                children.append(statement.accept(self))
+        if not stmt.body:
+            self._leaf(_FUNCTION_STMT, content)
+        else:
+            self._open_node(_FUNCTION_STMT, content)
+            visit = self._visit
 
-        self.current_depth -= 1
-        return self._create_node("FunctionStmt", content, children)
+            for statement in stmt.body:
+                visit(statement)
 
-    def visit_return_stmt(self, stmt) -> str:
-        children = []
-        if stmt.value:
-            self.current_depth += 1
-            children.append(stmt.value.accept(self))
-            self.current_depth -= 1
+            self._close_node()
 
-        return self._create_node("ReturnStmt", children=children if children else None)
+    def visit_return_stmt(self, stmt) -> None:
+        if not stmt.value:
+            self._leaf(_RETURN_STMT)
+        else:
+            self._open_node(_RETURN_STMT)
+            self._visit(stmt.value)
+            self._close_node()
 
-    def visit_class_stmt(self, stmt) -> str:
+    def visit_class_stmt(self, stmt) -> None:
         content = self._format_token(stmt.name)
         if stmt.superclass:
             content += f" < {self._format_token(stmt.superclass.name)}"
 
-        children = []
-        self.current_depth += 1
+        if not stmt.methods:
+            self._leaf(_CLASS_STMT, content)
+        else:
+            self._open_node(_CLASS_STMT, content)
+            visit = self._visit
 
-        for method in stmt.methods:
-            children.append(method.accept(self))
+            for method in stmt.methods:
+                visit(method)
 
-        self.current_depth -= 1
-        return self._create_node("ClassStmt", content, children if children else None)
+            self._close_node()
 
     # Expression visitors
-    def visit_binary_expr(self, expr) -> str:
-        children = []
-        self.current_depth += 1
+    def visit_binary_expr(self, expr) -> None:
+        self._open_node(_BINARY_EXPR)
 
-        children.append(expr.left.accept(self))
-        children.append(
+        self._visit(expr.left)
+        self._out.append(
             f'<div class="bg-yellow-400 text-yellow-800 px-1.5 py-0.5 rounded font-bold inline-block m-0.5 text-xs">{self._format_token(expr.operator)}</div>'
         )
-        children.append(expr.right.accept(self))
+        self._visit(expr.right)
 
-        self.current_depth -= 1
-        return self._create_node("BinaryExpr", children=children)
+        self._close_node()
 
-    def visit_grouping_expr(self, expr) -> str:
-        self.current_depth += 1
-        child = expr.expression.accept(self)
-        self.current_depth -= 1
-        return self._create_node("GroupingExpr", children=[child])
+    def visit_grouping_expr(self, expr) -> None:
+        self._open_node(_GROUPING_EXPR)
+        self._visit(expr.expression)
+        self._close_node()
 
-    def visit_literal_expr(self, expr) -> str:
+    def visit_literal_expr(self, expr) -> None:
         content = self._format_value(expr.value)
-        return self._create_node("Literal", content)
+        self._leaf(_LITERAL, content)
 
-    def visit_unary_expr(self, expr) -> str:
-        children = []
-        self.current_depth += 1
+    def visit_unary_expr(self, expr) -> None:
+        self._open_node(_UNARY_EXPR)
 
-        children.append(
+        self._out.append(
             f'<div class="bg-yellow-400 text-yellow-800 px-1.5 py-0.5 rounded font-bold inline-block m-0.5 text-xs">{self._format_token(expr.operator)}</div>'
         )
-        children.append(expr.right.accept(self))
+        self._visit(expr.right)
 
-        self.current_depth -= 1
-        return self._create_node("UnaryExpr", children=children)
+        self._close_node()
 
-    def visit_variable_expr(self, expr) -> str:
+    def visit_variable_expr(self, expr) -> None:
         content = self._format_token(expr.name)
-        return self._create_node("Variable", content)
+        self._leaf(_VARIABLE, content)
 
-    def visit_assign_expr(self, expr) -> str:
-        children = []
-        self.current_depth += 1
+    def visit_assign_expr(self, expr) -> None:
+        self._open_node(_ASSIGN_EXPR)
 
-        children.append(
+        self._out.append(
             f'<div class="text-xs text-gray-500 font-semibold my-1 mt-2 tracking-wide">{self._format_token(expr.name)} =</div>'
         )
-        children.append(expr.value.accept(self))
+        self._visit(expr.value)
 
-        self.current_depth -= 1
-        return self._create_node("AssignExpr", children=children)
+        self._close_node()
 
-    def visit_logical_expr(self, expr) -> str:
-        children = []
-        self.current_depth += 1
+    def visit_logical_expr(self, expr) -> None:
+        self._open_node(_LOGICAL_EXPR)
 
-        children.append(expr.left.accept(self))
-        children.append(
+        self._visit(expr.left)
+        self._out.append(
             f'<div class="bg-yellow-400 text-yellow-800 px-1.5 py-0.5 rounded font-bold inline-block m-0.5 text-xs">{self._format_token(expr.operator)}</div>'
         )
-        children.append(expr.right.accept(self))
+        self._visit(expr.right)
 
-        self.current_depth -= 1
-        return self._create_node("LogicalExpr", children=children)
+        self._close_node()
 
-    def visit_call_expr(self, expr) -> str:
-        children = []
-        self.current_depth += 1
+    def visit_call_expr(self, expr) -> None:
+        self._open_node(_CALL_EXPR)
+        out = self._out
 
-        children.append(
-            '<div class="text-xs text-gray-500 font-semibold my-1 mt-2 tracking-wide">function:</div>'
-        )
-        children.append(expr.callee.accept(self))
+        out.append(_LABEL_FUNCTION)
+        self._visit(expr.callee)
 
         if expr.arguments:
-            children.append(
-                '<div class="text-xs text-gray-500 font-semibold my-1 mt-2 tracking-wide">arguments:</div>'
-            )
+            out.append(_LABEL_ARGUMENTS)
+            visit = self._visit
             for arg in expr.arguments:
-                children.append(arg.accept(self))
+                visit(arg)
 
-        self.current_depth -= 1
-        return self._create_node("CallExpr", children=children)
+        self._close_node()
 
-    def visit_get_expr(self, expr) -> str:
-        children = []
-        self.current_depth += 1
+    def visit_get_expr(self, expr) -> None:
+        self._open_node(_GET_EXPR)
 
-        children.append(expr.object.accept(self))
-        children.append(
+        self._visit(expr.object)
+        self._out.append(
             f'<div class="bg-green-400 text-green-800 px-1.5 py-0.5 rounded font-medium inline-block m-0.5 text-xs">.{self._format_token(expr.name)}</div>'
         )
 
-        self.current_depth -= 1
-        return self._create_node("GetExpr", children=children)
+        self._close_node()
 
-    def visit_set_expr(self, expr) -> str:
-        children = []
-        self.current_depth += 1
+    def visit_set_expr(self, expr) -> None:
+        self._open_node(_SET_EXPR)
 
-        children.append(expr.object.accept(self))
-        children.append(
+        self._visit(expr.object)
+        self._out.append(
             f'<div class="bg-green-400 text-green-800 px-1.5 py-0.5 rounded font-medium inline-block m-0.5 text-xs">.{self._format_token(expr.name)} =</div>'
         )
-        children.append(expr.value.accept(self))
+        self._visit(expr.value)
 
-        self.current_depth -= 1
-        return self._create_node("SetExpr", children=children)
+        self._close_node()
 
-    def visit_this_expr(self, expr) -> str:
-        return self._create_node("This")
+    def visit_this_expr(self, expr) -> None:
+        self._leaf(_THIS)
 
-    def visit_super_expr(self, expr) -> str:
+    def visit_super_expr(self, expr) -> None:
         content = f"super.{self._format_token(expr.method)}"
-        return self._create_node("Super", content)
+        self._leaf(_SUPER, content)
@@ -1,14 +1,23 @@
 from django.shortcuts import render
 from django.http import HttpResponse
 from django.template.loader import render_to_string
-import sys
-import re
+import threading
 from io import StringIO
+from typing import List
 from interpreter import Lox
-from interpreter.scanner import Scanner
-from interpreter.parser import Parser, ParseError
+from interpreter.statements import Stmt
 from .ast_visualizer import ASTVisualizer
 
+# One Lox per worker thread, reset before each run. Keeping it around also keeps its
+# statement cache, so rerunning unchanged code skips the front end.
+_lox_tls = threading.local()
+
+# Output lines starting with any of these are highlighted as errors
+_ERROR_PREFIXES = ("Parse error", "Runtime error", "Error")
+_ERROR_LINE_OPEN = '<span style="color: #dc2626; font-weight: bold; background-color: #fef2f2; padding: 2px 4px; border-radius: 3px;">⚠️ '
+_ERROR_LINE_CLOSE = "</span>"
+_OUTPUT_SEPARATOR = '<span style="color: #6b7280; margin: 8px 0; display: block;">--- Output ---</span>'
+
 
 def index(request):
     return render(request, "pylox_web/index.html")
@@ -24,37 +33,30 @@ def highlight_error_messages(output):
 
     for i, line in enumerate(lines):
         # Common error patterns
-        if re.match(r"^(Parse error|Runtime error|Error)", line):
+        if line.startswith(_ERROR_PREFIXES):
             # Wrap error lines in red span with background
-            highlighted_line = f'<span style="color: #dc2626; font-weight: bold; background-color: #fef2f2; padding: 2px 4px; border-radius: 3px;">⚠️ {line}</span>'
-            highlighted_lines.append(highlighted_line)
+            highlighted_lines.append(_ERROR_LINE_OPEN + line + _ERROR_LINE_CLOSE)
 
             # Add separator after error if there's more content
             if i < len(lines) - 1 and lines[i + 1].strip():
-                highlighted_lines.append(
-                    '<span style="color: #6b7280; margin: 8px 0; display: block;">--- Output ---</span>'
-                )
+                highlighted_lines.append(_OUTPUT_SEPARATOR)
         else:
             highlighted_lines.append(line)
 
     return "\n".join(highlighted_lines)
 
 
-def generate_ast_visualization(code: str) -> str:
-    try:
-        scanner = Scanner(code)
-        tokens = scanner.scan_tokens()
+def ast_error_html(e: Exception) -> str:
+    return f'<div class="text-red-600 bg-red-50 border border-red-300 rounded-lg p-3 font-mono text-sm my-2">AST Generation Error: {str(e)}</div>'
 
-        parser = Parser(tokens)
-        statements = parser.parse()
 
+def generate_ast_visualization(statements: List[Stmt]) -> str:
+    try:
         visualizer = ASTVisualizer(max_depth=20, max_nodes=500)
         return visualizer.visualize_statements(statements)
 
-    except ParseError as e:
-        return f'<div class="text-red-600 bg-red-50 border border-red-300 rounded-lg p-3 font-mono text-sm my-2">Parse Error: {str(e)}</div>'
     except Exception as e:
-        return f'<div class="text-red-600 bg-red-50 border border-red-300 rounded-lg p-3 font-mono text-sm my-2">AST Generation Error: {str(e)}</div>'
+        return ast_error_html(e)
 
 
 def execute(request):
@@ -79,26 +81,24 @@ def execute(request):
             content_type="text/vnd.turbo-stream.html",
         )
 
-    ast_html = generate_ast_visualization(code)
-    ast_content = render_to_string("pylox_web/ast.html", {"ast_html": ast_html})
-
+    ast_html = None
     try:
-        captured_output = StringIO()
-        old_stdout = sys.stdout
-        old_stderr = sys.stderr
-        sys.stdout = sys.stderr = captured_output
-
-        lox = Lox()
+        lox = getattr(_lox_tls, "lox", None)
+        if lox is None:
+            lox = _lox_tls.lox = Lox()
+        lox.reset()
 
-        lox.had_error = False
-        lox.had_runtime_error = False
+        # Lox writes output and error messages straight to this buffer, so there's no
+        # process-wide sys.stdout swap for concurrent requests to trip over
+        captured_output = StringIO()
+        lox.stdout = captured_output
 
-        lox.run(code)
+        # Scan and parse once; the AST panel and the run share the statements
+        statements = lox.parse(code)
+        ast_html = generate_ast_visualization(statements)
+        lox.run_parsed(statements)
         output = captured_output.getvalue().strip()
 
-        sys.stdout = old_stdout
-        sys.stderr = old_stderr
-
         if not output:
             result_content = render_to_string(
                 "pylox_web/output.html",
@@ -111,11 +111,13 @@ def execute(request):
                 "pylox_web/output.html", {"content": highlighted_output}
             )
     except Exception as e:
-        sys.stdout = old_stdout
-        sys.stderr = old_stderr
         result_content = render_to_string(
             "pylox_web/output.html", {"content": f"Error: {str(e)}"}
         )
+        if ast_html is None:
+            ast_html = ast_error_html(e)
+
+    ast_content = render_to_string("pylox_web/ast.html", {"ast_html": ast_html})
 
     # Return both execution output and AST visualization
     return HttpResponse(